@@ -2,23 +2,33 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
 import logging
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Union
+from itertools import chain, islice
+from typing import Any, Dict, Iterator, List, Optional, Union
 
-import dateparser
-import gradio as gr
-from fastapi import APIRouter, FastAPI, HTTPException, Query
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from db import repository as repo
+from server.responses import ORJSONResponse, iter_json_array
 from tools.get_entries import get_entries as fetch_entries
 from tools.health_schema import SymptomLog
-from tools.log_entry import tool_log
-from tools.summarize import tool_summarize
+from tools.llm import aclose_http_pool, get_llm
+from tools.log_entry import LogBatcher, tool_log, tool_log_str
+from tools.summarize import summarize_with_status, summarize_with_status_async
 
 
 logger = logging.getLogger(__name__)
@@ -30,13 +40,43 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 def log_entry(user_id: str, message: str):
     """Adapter exposing ``tool_log`` with a friendlier signature."""
 
-    return tool_log(text=message, user_id=user_id)
+    result = tool_log(text=message, user_id=user_id)
+    _invalidate_user(user_id)
+    return result
 
 
-def _ensure_aware(dt: Optional[datetime]) -> Optional[datetime]:
-    if dt is None:
-        return None
-    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+def _log_entry_str(user_id: str, message: str) -> str:
+    """``log_entry`` keeping the old string contract for the agent tool."""
+
+    result = tool_log_str(text=message, user_id=user_id)
+    _invalidate_user(user_id)
+    return result
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO 8601 string (``Z`` suffix included); raises ``ValueError`` otherwise."""
+
+    return datetime.fromisoformat(value)
+
+
+@functools.lru_cache(maxsize=1)
+def _dateparser():
+    """Import ``dateparser`` on first use; it loads every locale at import time."""
+
+    import dateparser
+
+    return dateparser
+
+
+def _parse_datetime(value: str) -> Optional[datetime]:
+    """Fast ISO path, falling back to ``dateparser`` for free-form input."""
+
+    try:
+        return _parse_iso(value)
+    except ValueError:
+        # Relative phrases ("yesterday") depend on the current time: never cache them.
+        return _dateparser().parse(value)
 
 
 def _parse_since(value: Optional[Union[str, datetime]]) -> Optional[datetime]:
@@ -45,27 +85,91 @@ def _parse_since(value: Optional[Union[str, datetime]]) -> Optional[datetime]:
     if value is None:
         return None
     if isinstance(value, datetime):
-        return _ensure_aware(value)
-    if not isinstance(value, str):
+        dt = value
+    elif isinstance(value, str):
+        dt = _parse_datetime(value)
+        if not dt:
+            raise ValueError("Invalid 'since' parameter")
+    else:
         raise TypeError("since must be a datetime or ISO-like string")
-    dt = dateparser.parse(value)
-    if not dt:
-        raise ValueError("Invalid 'since' parameter")
-    return _ensure_aware(dt)
+    # Aware values (ISO strings with "Z"/"+00:00") pass through untouched
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def _invalidate_user(user_id: str) -> None:
+    """Drop cached summaries for ``user_id`` after a write."""
+
+    with _summary_cache_lock:
+        _SUMMARY_CACHE.pop(user_id, None)
 
 
 def get_entries(user_id: str, since: Optional[Union[str, datetime]] = None):
-    """Adapter for ``tools.get_entries.get_entries`` with optional parsing."""
+    """Adapter for ``tools.get_entries.get_entries`` with optional parsing.
 
-    dt = _parse_since(since)
-    return fetch_entries(user_id=user_id, since=dt)
+    Repeated reads are served by the repository's bounded ``list_logs`` cache,
+    which every write invalidates.
+    """
+
+    return list(fetch_entries(user_id=user_id, since=_parse_since(since)))
+
+
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", "300"))
+_SUMMARY_CACHE_SIZE = 1024
+
+# user_id -> (latest entry id, monotonic timestamp, summary text), LRU-bounded
+# like the repository's list cache since user_id comes straight from callers
+_SUMMARY_CACHE: "OrderedDict[str, tuple[Optional[str], float, str]]" = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
+
+def _cached_summary(user_id: str, last_id: Optional[str]) -> Optional[str]:
+    with _summary_cache_lock:
+        cached = _SUMMARY_CACHE.get(user_id)
+        if cached and cached[0] == last_id and time.monotonic() - cached[1] < SUMMARY_CACHE_TTL:
+            _SUMMARY_CACHE.move_to_end(user_id)
+            return cached[2]
+    return None
+
+
+def _store_summary(user_id: str, last_id: Optional[str], text: str) -> None:
+    with _summary_cache_lock:
+        _SUMMARY_CACHE[user_id] = (last_id, time.monotonic(), text)
+        _SUMMARY_CACHE.move_to_end(user_id)
+        if len(_SUMMARY_CACHE) > _SUMMARY_CACHE_SIZE:
+            _SUMMARY_CACHE.popitem(last=False)
 
 
 def summarize(user_id: str, question: str | None = None, days: int = 7):
-    """Adapter for ``tool_summarize`` ignoring extra guidance parameters for now."""
+    """Adapter for ``tool_summarize`` ignoring extra guidance parameters for now.
+
+    Summaries are cached per user and reused while the user's latest entry id
+    is unchanged and the TTL has not expired, skipping the LLM round-trip.
+    The bullet-list fallback served on LLM errors is never cached.
+    """
 
     _ = question, days  # kept for compatibility / future use
-    return tool_summarize(user_id=user_id)
+    last_id = repo.latest_entry_id(user_id)
+    if (text := _cached_summary(user_id, last_id)) is not None:
+        return text
+
+    text, from_llm = summarize_with_status(user_id=user_id)
+    if from_llm:
+        _store_summary(user_id, last_id, text)
+    return text
+
+
+async def summarize_async(user_id: str, question: str | None = None, days: int = 7):
+    """Async counterpart of :func:`summarize` used by the API endpoint."""
+
+    _ = question, days
+    last_id = await run_in_threadpool(repo.latest_entry_id, user_id)
+    if (text := _cached_summary(user_id, last_id)) is not None:
+        return text
+
+    text, from_llm = await summarize_with_status_async(user_id=user_id)
+    if from_llm:
+        _store_summary(user_id, last_id, text)
+    return text
 
 
 ROUTER_MODE = os.getenv("ROUTER_MODE", "heuristic").strip().lower()  # "heuristic" (default) or "llamaindex"
@@ -94,32 +198,50 @@ TIME_HINT_RE = re.compile(
     re.IGNORECASE,
 )
 
+SUMMARIZE_RE = re.compile(r"\b(summarize|summary|trend|overview|doctor)\b", re.IGNORECASE)
+LIST_RE = re.compile(r"\b(show|list|entries|logs?)\b", re.IGNORECASE)
+
+# All three intent checks in one scan; heuristic_route applies the priority.
+INTENT_RE = re.compile(
+    rf"(?P<sum>{SUMMARIZE_RE.pattern})"
+    rf"|(?P<list>{LIST_RE.pattern})"
+    # Symptom hints match as substrings (no word boundaries) so "headaches" /
+    # "painful" still count.
+    rf"|(?P<log>{TIME_HINT_RE.pattern}|"
+    + "|".join(re.escape(h) for h in sorted(SYMPTOM_HINTS, key=len, reverse=True))
+    + ")",
+    re.IGNORECASE,
+)
 
-def _looks_like_logging(text: str) -> bool:
-    """Heuristic: symptom-ish words or time anchors → likely a log request."""
-
-    t = text.lower()
-    symptomy = any(w in t for w in SYMPTOM_HINTS)
-    timey = bool(TIME_HINT_RE.search(t))
-    return symptomy or timey
-
-
-def _is_summarize_intent(text: str) -> bool:
-    return bool(re.search(r"\b(summarize|summary|trend|overview|doctor)\b", text, re.I))
 
+def _classify_intent(text: str) -> Optional[str]:
+    """Return ``"sum"``, ``"list"`` or ``"log"`` (in that priority), or ``None``."""
 
-def _is_list_intent(text: str) -> bool:
-    return bool(re.search(r"\b(show|list|entries|logs?)\b", text, re.I))
+    found = set()
+    for m in INTENT_RE.finditer(text):
+        if m["sum"] is not None:
+            return "sum"  # highest priority: no need to scan further
+        found.add("list" if m["list"] is not None else "log")
+    if "list" in found:
+        return "list"
+    return "log" if found else None
 
 
 def format_confirmation(result) -> str:
     """Turn tool results into short user-facing text."""
 
     try:
-        main = getattr(result, "main_symptom", None) or getattr(result, "symptom", None)
-        sev = getattr(result, "severity", None)
-        ts = getattr(result, "timestamp", None)
-        meds = getattr(result, "medicines_taken", None)
+        if isinstance(result, BaseModel):
+            d = result.model_dump()
+            main = d.get("main_symptom") or d.get("symptom")
+            sev = d.get("severity")
+            ts = d.get("timestamp")
+            meds = d.get("medicines_taken")
+        else:
+            main = getattr(result, "main_symptom", None) or getattr(result, "symptom", None)
+            sev = getattr(result, "severity", None)
+            ts = getattr(result, "timestamp", None)
+            meds = getattr(result, "medicines_taken", None)
         if main or sev or ts or meds:
             parts = []
             if main:
@@ -138,27 +260,43 @@ def format_confirmation(result) -> str:
         return str(result)
 
 
+def _cmd_log(user_id: str, msg: str) -> str:
+    payload = msg[len("/log"):].strip() or msg
+    return format_confirmation(log_entry(user_id=user_id, message=payload))
+
+
+def _cmd_entries(user_id: str, msg: str) -> str:
+    return format_confirmation(get_entries(user_id=user_id))
+
+
+def _cmd_sum(user_id: str, msg: str) -> str:
+    payload = msg[len("/sum"):].strip() or "Summarize my recent symptoms."
+    return str(summarize(user_id=user_id, question=payload))
+
+
+_COMMANDS = {
+    "/log": _cmd_log,
+    "/entries": _cmd_entries,
+    "/sum": _cmd_sum,
+}
+
+
 def heuristic_route(user_id: str, text: str):
     """Rule-based router: slash commands > keywords > symptom heuristic > default summarize."""
 
     msg = text.strip()
     head = msg.split(" ", 1)[0].lower()
 
-    if head == "/log":
-        payload = msg[len("/log"):].strip() or msg
-        return format_confirmation(log_entry(user_id=user_id, message=payload))
-    if head == "/entries":
-        return format_confirmation(get_entries(user_id=user_id))
-    if head == "/sum":
-        payload = msg[len("/sum"):].strip() or "Summarize my recent symptoms."
-        return str(summarize(user_id=user_id, question=payload))
+    if handler := _COMMANDS.get(head):
+        return handler(user_id, msg)
 
-    if _is_summarize_intent(msg):
+    intent = _classify_intent(msg)
+    if intent == "sum":
         return str(summarize(user_id=user_id, question=msg))
-    if _is_list_intent(msg):
+    if intent == "list":
         return format_confirmation(get_entries(user_id=user_id))
 
-    if _looks_like_logging(msg):
+    if intent == "log":
         try:
             return format_confirmation(log_entry(user_id=user_id, message=msg))
         except Exception as e:  # pragma: no cover - guard rails
@@ -171,15 +309,25 @@ def heuristic_route(user_id: str, text: str):
     return str(summarize(user_id=user_id, question=msg))
 
 
-def llamaindex_route(user_id: str, text: str) -> str:
-    """Route via a small LlamaIndex agent. Raises on indecision so caller can fallback."""
+AGENT_SYSTEM_PROMPT = (
+    "You are HealthTrack-AI. Choose exactly ONE tool that best answers the user.\n"
+    "- If the message looks like a symptom note (e.g., 'Headache 6/10 since 8pm…'), use log_entry.\n"
+    "- If they ask to see notes, use get_entries.\n"
+    "- If they ask for an overview/trends/doctor note, use summarize.\n"
+    "Be concise. Never invent data."
+)
+
+_AGENT_LOCAL = threading.local()
+
+
+@functools.lru_cache(maxsize=1)
+def _agent_tools():
+    """Build the stateless routing tools once; ``user_id`` travels in the prompt."""
 
-    from llama_index.core.agent import ReActAgent
     from llama_index.core.tools import FunctionTool
-    from llama_index.llms.openai import OpenAI
 
     t_log = FunctionTool.from_defaults(
-        fn=lambda user_id, message: log_entry(user_id=user_id, message=message),
+        fn=lambda user_id, message: _log_entry_str(user_id=user_id, message=message),
         name="log_entry",
         description="Parse free-text symptom note, save to DB, and update the index.",
     )
@@ -195,30 +343,100 @@ def llamaindex_route(user_id: str, text: str) -> str:
         name="summarize",
         description="Concise, doctor-friendly summary grounded in recent entries.",
     )
+    return [t_log, t_entries, t_sum]
 
-    SYSTEM_PROMPT = (
-        "You are HealthTrack-AI. Choose exactly ONE tool that best answers the user.\n"
-        "- If the message looks like a symptom note (e.g., 'Headache 6/10 since 8pm…'), use log_entry.\n"
-        "- If they ask to see notes, use get_entries.\n"
-        "- If they ask for an overview/trends/doctor note, use summarize.\n"
-        "Be concise. Never invent data."
-    )
 
-    llm = OpenAI(model="gpt-4o-mini", temperature=0.1)
-    agent = ReActAgent.from_tools(
-        [t_log, t_entries, t_sum], system_prompt=SYSTEM_PROMPT, llm=llm, verbose=False
+def _build_agent():
+    """Construct a routing agent over the shared tools and pooled LLM client."""
+
+    from llama_index.core.agent import ReActAgent
+
+    return ReActAgent.from_tools(
+        _agent_tools(),
+        system_prompt=AGENT_SYSTEM_PROMPT,
+        llm=get_llm("gpt-4o-mini", 0.1),
+        verbose=False,
     )
 
-    prompt = f"user_id={user_id}\n{text}"
-    resp = agent.chat(prompt)
 
+def _get_agent():
+    """Return this thread's LlamaIndex routing agent, building it on first use.
+
+    Agents hold mutable chat memory, so each worker thread gets its own; the
+    tools and the pooled LLM client are shared by all of them.
+    """
+
+    agent = getattr(_AGENT_LOCAL, "agent", None)
+    if agent is None:
+        agent = _AGENT_LOCAL.agent = _build_agent()
+    return agent
+
+
+def _agent_reply(resp) -> str:
     s = str(resp).strip()
     if not s or "ToolExecutionError" in s or "I cannot decide" in s:
         raise RuntimeError("Agent indecision or failure")
-
     return s
 
 
+def llamaindex_route(user_id: str, text: str) -> str:
+    """Route via a small LlamaIndex agent. Raises on indecision so caller can fallback."""
+
+    agent = _get_agent()
+
+    prompt = f"user_id={user_id}\n{text}"
+    # Start from an empty history: the agent is reused, conversations are not.
+    return _agent_reply(agent.chat(prompt, chat_history=[]))
+
+
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "2"))
+
+_agent_pool: Optional[asyncio.Queue] = None
+_agent_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+_agents_built = 0
+
+
+@contextlib.asynccontextmanager
+async def _checkout_agent():
+    """Borrow a prebuilt agent from the event loop's pool, returning it afterwards.
+
+    Coroutines interleave on one thread, so the thread-local agent cannot be
+    shared between them; instead up to ``AGENT_POOL_SIZE`` agents are built on
+    demand and handed out one call at a time, with memory reset on return.
+    """
+
+    global _agent_pool, _agent_pool_loop, _agents_built
+    loop = asyncio.get_running_loop()
+    if _agent_pool is None or _agent_pool_loop is not loop:
+        _agent_pool, _agent_pool_loop, _agents_built = asyncio.Queue(), loop, 0
+    pool = _agent_pool
+
+    if pool.empty() and _agents_built < AGENT_POOL_SIZE:
+        _agents_built += 1
+        try:
+            agent = await run_in_threadpool(_build_agent)
+        except BaseException:
+            _agents_built -= 1
+            raise
+    else:
+        agent = await pool.get()
+    try:
+        yield agent
+    finally:
+        reset = getattr(agent, "reset", None)
+        if callable(reset):
+            reset()
+        pool.put_nowait(agent)
+
+
+async def llamaindex_route_async(user_id: str, text: str) -> str:
+    """Async :func:`llamaindex_route`: the LLM round-trips are awaited, not blocked on."""
+
+    prompt = f"user_id={user_id}\n{text}"
+    async with _checkout_agent() as agent:
+        return _agent_reply(await agent.achat(prompt, chat_history=[]))
+
+
 def route_message(user_id: str, text: str) -> str:
     """Main entry: try agent when enabled; otherwise or on failure, use heuristic."""
 
@@ -231,45 +449,90 @@ def route_message(user_id: str, text: str) -> str:
     return heuristic_route(user_id=user_id, text=text)
 
 
+async def route_message_async(user_id: str, text: str) -> str:
+    """Async :func:`route_message` used by the UI; blocking heuristics run in a thread."""
+
+    if ROUTER_MODE == "llamaindex":
+        try:
+            return await llamaindex_route_async(user_id=user_id, text=text)
+        except Exception as e:  # pragma: no cover - guard rails
+            logger.warning("llamaindex_route failed (%s); falling back to heuristic.", e)
+    return await run_in_threadpool(heuristic_route, user_id=user_id, text=text)
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 
-def _serialise(entry: SymptomLog | Dict[str, Any]) -> Dict[str, Any]:
-    """Convert a ``SymptomLog`` (or dict) to JSON-serialisable dict."""
+_ENTRIES_ADAPTER = TypeAdapter(List[SymptomLog])
 
-    data = entry.model_dump(exclude_none=True) if isinstance(entry, SymptomLog) else dict(entry)
 
-    for key in ("created_at", "started_at", "ended_at"):
-        if val := data.get(key):
-            if hasattr(val, "isoformat"):
-                data[key] = val.isoformat()
+def _serialise(entry: SymptomLog | Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a ``SymptomLog`` (or dict) to a plain dict.
 
-    if (sev := data.get("severity")) and hasattr(sev, "value"):
-        data["severity"] = sev.value
+    Datetimes and enums are left as-is; ``ORJSONResponse`` encodes them.
+    """
 
-    return data
+    return entry.model_dump(exclude_none=True) if isinstance(entry, SymptomLog) else dict(entry)
 
 
 def _log_symptom(user_id: str, text: str) -> Dict[str, Any]:
     """Persist ``text`` for ``user_id`` and return the stored entry."""
 
-    msg = log_entry(user_id=user_id, message=text)
-    try:
-        entry_id = msg.rsplit(":", 1)[1].strip()
-    except Exception as exc:  # pragma: no cover - defensive
-        raise ValueError("Unable to parse log entry id") from exc
+    return _serialise(log_entry(user_id=user_id, message=text))
+
 
-    entry = repo.get_log(entry_id)
-    if not entry:  # pragma: no cover - defensive
-        raise RuntimeError("Log entry not found")
+_LOG_BATCHER = LogBatcher()
+
+
+async def _log_symptom_async(user_id: str, text: str) -> Dict[str, Any]:
+    """Batched variant of :func:`_log_symptom` used by the API endpoint."""
+
+    entry = await _LOG_BATCHER.submit(user_id=user_id, text=text)
+    _invalidate_user(user_id)
     return _serialise(entry)
 
 
+def _dump_entries(entries: List[SymptomLog | Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Dump ``entries`` in a single pydantic-core pass.
+
+    Datetimes and enums stay native for ``ORJSONResponse`` to encode.
+    """
+
+    # Results are homogeneous, so check the type once rather than per row
+    if entries and not isinstance(entries[0], SymptomLog):
+        return [dict(e) for e in entries]
+    return _ENTRIES_ADAPTER.dump_python(entries, exclude_none=True)
+
+
 def _list_entries(user_id: str, since: str | None = None) -> List[Dict[str, Any]]:
-    """Return all entries for ``user_id`` optionally filtered by ``since``."""
+    """Return all entries for ``user_id`` optionally filtered by ``since``.
+
+    The ``since`` predicate is applied in SQL by the repository.
+    """
+
+    return _dump_entries(list(get_entries(user_id=user_id, since=since)))
+
+
+# Above this many rows /api/entries streams the array instead of building it whole
+ENTRIES_STREAM_THRESHOLD = int(os.getenv("ENTRIES_STREAM_THRESHOLD", "500"))
 
-    entries = [_serialise(e) for e in get_entries(user_id=user_id, since=since)]
-    return entries
+
+def _open_entries(
+    user_id: str, since: str | None = None
+) -> tuple[List[SymptomLog], Optional[Iterator[SymptomLog]]]:
+    """Read up to ``ENTRIES_STREAM_THRESHOLD`` rows straight from the repository.
+
+    Returns ``(rows, None)`` when that is all of them; otherwise the rows read
+    so far plus the still-open :func:`db.repository.iter_logs` cursor, so large
+    results are never held in memory whole.
+    """
+
+    rows = repo.iter_logs(user_id=user_id, since=_parse_since(since))
+    head = list(islice(rows, ENTRIES_STREAM_THRESHOLD + 1))
+    if len(head) <= ENTRIES_STREAM_THRESHOLD:
+        rows.close()
+        return head, None
+    return head, rows
 
 
 # ---------------------------------------------------------------------------
@@ -281,15 +544,38 @@ class LogRequest(BaseModel):
     text: str
 
 
+async def _log_request(request: Request) -> LogRequest:
+    """Validate the raw body with pydantic-core's JSON parser in one pass.
+
+    This skips FastAPI's ``json.loads`` → dict → validate round-trip for the
+    hottest write endpoint while keeping the usual 422 error shape.
+    """
+
+    try:
+        return LogRequest.model_validate_json(await request.body())
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in exc.errors()]
+        ) from exc
+
+
 api_router = APIRouter(prefix="/api")
 
 
-@api_router.post("/log")
-def api_log(req: LogRequest):
+@api_router.post(
+    "/log",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": LogRequest.model_json_schema()}},
+        }
+    },
+)
+async def api_log(req: LogRequest = Depends(_log_request)):
     """Log a free-form symptom description."""
 
     try:
-        return _log_symptom(req.user_id, req.text)
+        return await _log_symptom_async(req.user_id, req.text)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # pragma: no cover - defensive
@@ -298,14 +584,21 @@ def api_log(req: LogRequest):
 
 
 @api_router.get("/entries")
-def api_entries(
+async def api_entries(
     user_id: str = Query(..., description="User identifier"),
     since: str | None = Query(None, description="Return entries since this date"),
 ):
     """List logged entries."""
 
     try:
-        return _list_entries(user_id, since)
+        entries, rest = await run_in_threadpool(_open_entries, user_id, since)
+        if rest is not None:
+            return StreamingResponse(
+                iter_json_array(_serialise(e) for e in chain(entries, rest)),
+                media_type="application/json",
+            )
+        # Returning the response directly skips FastAPI's jsonable_encoder walk
+        return ORJSONResponse(_dump_entries(entries))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # pragma: no cover - defensive
@@ -314,30 +607,41 @@ def api_entries(
 
 
 @api_router.get("/summary")
-def api_summary(user_id: str = Query(..., description="User identifier")):
+async def api_summary(user_id: str = Query(..., description="User identifier")):
     """Return a doctor-friendly summary of recent entries."""
 
     try:
-        return {"summary": summarize(user_id=user_id)}
+        return {"summary": await summarize_async(user_id=user_id)}
     except Exception as exc:  # pragma: no cover - defensive
         logger.exception("Summary endpoint failed")
         raise HTTPException(status_code=500, detail="Internal Server Error") from exc
 
 
-fastapi_app = FastAPI()
+@contextlib.asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    # Schema setup runs once per process here instead of at import time
+    await run_in_threadpool(repo.init_db)
+    yield
+    # Flush queued log writes and their index updates before the loop goes away
+    await _LOG_BATCHER.aclose()
+    await aclose_http_pool()
+
+
+fastapi_app = FastAPI(default_response_class=ORJSONResponse, lifespan=_lifespan)
 fastapi_app.include_router(api_router)
 fastapi_app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
+    allow_origins=frozenset({
         "http://localhost",
         "http://localhost:3000",
         "http://127.0.0.1",
         "https://localhost",
         "https://127.0.0.1",
-    ],
+    }),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # let browsers cache preflights for a day
 )
 
 
@@ -345,17 +649,32 @@ fastapi_app.add_middleware(
 # Gradio UI
 
 
-with gr.Blocks() as demo:
-    user_box = gr.Textbox(label="User ID")
-    message_box = gr.Textbox(label="Message", lines=3)
-    gr.Markdown("Tip: /log …, /entries, /sum …")
-    send_btn = gr.Button("Send")
-    response_box = gr.Markdown(label="Response")
+def build_ui():
+    """Build the Gradio demo; ``gradio`` is imported here so API-only runs skip it."""
+
+    import gradio as gr
+
+    with gr.Blocks() as demo:
+        user_box = gr.Textbox(label="User ID")
+        message_box = gr.Textbox(label="Message", lines=3)
+        gr.Markdown("Tip: /log …, /entries, /sum …")
+        send_btn = gr.Button("Send")
+        response_box = gr.Markdown(label="Response")
+
+        send_btn.click(route_message_async, inputs=[user_box, message_box], outputs=response_box)
+        message_box.submit(route_message_async, inputs=[user_box, message_box], outputs=response_box)
 
-    send_btn.click(route_message, inputs=[user_box, message_box], outputs=response_box)
-    message_box.submit(route_message, inputs=[user_box, message_box], outputs=response_box)
+    # Bound UI concurrency; LLM calls are further capped by tools.llm.LLM_CONCURRENCY,
+    # which the API's summary endpoint shares.
+    demo.queue(default_concurrency_limit=2, max_size=64)
+    return demo
 
 
-# Mount Gradio UI at `/` and expose FastAPI under `/api`.
-app = gr.mount_gradio_app(fastapi_app, demo, path="/")
+# Expose FastAPI under `/api` and mount the Gradio UI at `/ui`, so API requests
+# never traverse Gradio's routes. DISABLE_UI=1 serves the API alone.
+if os.getenv("DISABLE_UI"):
+    app = fastapi_app
+else:
+    import gradio as gr
 
+    app = gr.mount_gradio_app(fastapi_app, build_ui(), path="/ui")
@@ -1,11 +1,16 @@
 from .engine import SessionLocal, Base  # noqa: F401
-from .repository import add_log, list_logs, get_log, get_entries  # noqa: F401
+from .repository import init_db, add_log, add_logs, iter_logs, list_logs, get_log, get_entries, latest_entry_id, invalidate  # noqa: F401
 
 __all__ = [
     "SessionLocal",
+    "init_db",
     "add_log",
+    "add_logs",
+    "iter_logs",
     "list_logs",
     "get_log",
     "get_entries",
+    "latest_entry_id",
+    "invalidate",
     "Base",
 ]
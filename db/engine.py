@@ -3,7 +3,8 @@ SQLAlchemy engine + Session factory
 """
 import os
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "health.db"
@@ -14,13 +15,38 @@ class Base(DeclarativeBase):
     """Declarative base for all ORM models."""
     pass
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},  # needed for SQLite multithread
-    echo=False,
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",        # readers don't block on the writer
+    "PRAGMA synchronous=NORMAL",      # fsync at checkpoints, not every commit
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",     # 256 MiB memory-mapped reads
+    "PRAGMA cache_size=-64000",       # ~64 MiB page cache per connection
 )
-SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
 
-# Create tables as soon as module is imported
-from db import models  # noqa: E402 – side-effect import
-Base.metadata.create_all(engine)
+def _apply_sqlite_pragmas(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cur.execute(pragma)
+    finally:
+        cur.close()
+
+def make_engine(url: str) -> Engine:
+    """Create a pooled SQLite engine tuned for concurrent API traffic."""
+    eng = create_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,  # needed for SQLite multithread
+            "timeout": 30,               # wait on the write lock instead of failing fast
+        },
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=False,             # local file: no dropped connections to detect
+        query_cache_size=200,            # the repository issues a small fixed set of statements
+        echo=False,
+    )
+    event.listen(eng, "connect", _apply_sqlite_pragmas)
+    return eng
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
@@ -1,15 +1,21 @@
 """
 SQLAlchemy ↔️ Pydantic mapping for SymptomLog.
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
+from zoneinfo import ZoneInfo
 
 from sqlalchemy import (
+    BigInteger,
     Column,
     DateTime,
     Enum,
+    Index,
     String,
     Text,
+    TypeDecorator,
+    inspect,
+    text,
 )
 from sqlalchemy.dialects.sqlite import JSON
 from uuid import uuid4
@@ -17,6 +23,35 @@ from uuid import uuid4
 from db.engine import Base
 from tools.health_schema import Severity
 
+_UTC = ZoneInfo("UTC")
+_EPOCH = datetime(1970, 1, 1, tzinfo=_UTC)
+
+
+def _to_epoch_us(dt: datetime) -> int:
+    """Microseconds since the Unix epoch; naive datetimes are taken as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_UTC)
+    # Integer timedelta arithmetic: exact, unlike dt.timestamp() * 1e6
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+class EpochMicros(TypeDecorator):
+    """A UTC datetime stored as integer epoch microseconds.
+
+    Cheaper to bind, compare and index than SQLite's datetime text, and reads
+    come back already tagged as UTC.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else _to_epoch_us(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else _EPOCH + timedelta(microseconds=value)
+
+
 class SymptomLogORM(Base):
     __tablename__ = "symptom_logs"
 
@@ -24,8 +59,62 @@ class SymptomLogORM(Base):
     created_at = Column(DateTime(timezone=True), nullable=False, index=True)
     symptom = Column(String, nullable=False)
     severity = Column(Enum(Severity), nullable=False)
-    started_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(EpochMicros, nullable=False, index=True)
     ended_at = Column(DateTime(timezone=True))
     location = Column(String)
     medicines_taken = Column(JSON)
     notes = Column(Text)
+    # Denormalised from notes JSON so per-user queries hit an index; the
+    # composite index below leads with it, so it needs none of its own
+    user_id = Column(String)
+
+    __table_args__ = (
+        # Serves "latest entry for user" and per-user time-range scans
+        Index("ix_symptom_logs_user_created", "user_id", created_at.desc()),
+    )
+
+
+def ensure_user_id_column(engine) -> None:
+    """Add and backfill ``symptom_logs.user_id`` on databases created before it existed."""
+    columns = {c["name"] for c in inspect(engine).get_columns(SymptomLogORM.__tablename__)}
+    if "user_id" in columns:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE symptom_logs ADD COLUMN user_id VARCHAR"))
+        conn.execute(
+            text(
+                "UPDATE symptom_logs SET user_id = json_extract(notes, '$.user_id') "
+                "WHERE json_valid(notes)"
+            )
+        )
+
+
+def ensure_epoch_started_at(engine) -> None:
+    """Convert ``started_at`` values written as datetime text to epoch microseconds.
+
+    Rows from before :class:`EpochMicros` hold SQLAlchemy's naive-UTC text,
+    which SQLite would compare as greater than every integer.
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text("SELECT id, started_at FROM symptom_logs WHERE typeof(started_at) = 'text'")
+        ).all()
+        if not rows:
+            return
+        conn.execute(
+            text("UPDATE symptom_logs SET started_at = :us WHERE id = :id"),
+            [{"id": row_id, "us": _to_epoch_us(datetime.fromisoformat(raw))} for row_id, raw in rows],
+        )
+
+
+def ensure_indexes(engine) -> None:
+    """Create any declared index missing from an existing ``symptom_logs`` table.
+
+    ``create_all`` only adds indexes together with a new table, so databases
+    created before an index was declared need this.
+    """
+    for index in SymptomLogORM.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    # Superseded by ix_symptom_logs_user_created, which leads with user_id
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_symptom_logs_user_id"))
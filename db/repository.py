@@ -3,59 +3,123 @@ Thin CRUD wrapper around SQLAlchemy sessions.
 """
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Iterable, Iterator, List, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import delete, insert, or_, select
 from sqlalchemy.orm import sessionmaker
 
-from db.engine import SessionLocal as _DefaultSessionLocal, engine as _default_engine, Base
+from db.engine import SessionLocal as _DefaultSessionLocal, engine as _default_engine, Base, make_engine
 from db.models import SymptomLogORM
 from tools.health_schema import SymptomLog
 
-_engine_cwd = Path.cwd()
-_engine = _default_engine
-_SessionLocal = _DefaultSessionLocal
-_engine_path = Path(_engine.url.database).resolve()
+_LOG_CACHE_SIZE = 1024
+_log_cache: "OrderedDict[str, SymptomLog]" = OrderedDict()
+_log_cache_lock = threading.Lock()
 
-def init_db(engine) -> None:
-    """Create database tables for a given engine."""
-    from db import models  # noqa: F401 – ensure model import for metadata
+# list_logs results keyed on (user_id, since, write epoch); any write bumps
+# the epoch, so stale keys simply stop matching and age out of the LRU.
+_LIST_CACHE_SIZE = 1024
+_LIST_CACHE_TTL = 30.0
+_list_cache: "OrderedDict[tuple, tuple[float, List[SymptomLog]]]" = OrderedDict()
+_write_epoch = 0
 
-    Base.metadata.create_all(engine)
+def invalidate(log_id: Optional[str] = None) -> None:
+    """Drop ``log_id`` (or every entry when ``None``) from the ``get_log`` cache.
 
-@contextmanager
-def session_scope():
-    """Provide a transactional scope around a series of operations.
+    Either way the ``list_logs`` cache is invalidated too.
+    """
+    global _write_epoch
+    with _log_cache_lock:
+        _write_epoch += 1
+        if log_id is None:
+            _log_cache.clear()
+            _list_cache.clear()
+        else:
+            _log_cache.pop(log_id, None)
 
-    If the current working directory changes, a new engine bound to the
-    directory's ``health.db`` is created and initialized.
+def init_db(engine=None) -> None:
+    """Create tables and apply migrations for ``engine`` (default: the bound one).
+
+    Called once at application startup rather than on import, so workers do
+    not each run schema queries while holding the SQLite file lock; callers
+    outside the server get it lazily on first DB access. Repeat calls for an
+    already-prepared bound path return immediately.
     """
-    global _engine_cwd, _engine_path, _engine, _SessionLocal
+    from db import models  # noqa: F401 – ensure model import for metadata
+
+    if engine is None:
+        with _bind_lock:
+            if _engine_path in _initialised:
+                return
+            Base.metadata.create_all(_engine)
+            models.ensure_user_id_column(_engine)
+            models.ensure_epoch_started_at(_engine)
+            models.ensure_indexes(_engine)
+            _initialised.add(_engine_path)
+        return
+    Base.metadata.create_all(engine)
+    models.ensure_user_id_column(engine)
+    models.ensure_epoch_started_at(engine)
+    models.ensure_indexes(engine)
 
-    cwd = Path.cwd()
+def _resolve_db_path() -> Path:
+    """``HEALTH_DB_PATH`` if set, else ``health.db`` in the working directory."""
     env_path = os.environ.get("HEALTH_DB_PATH")
     if env_path:
-        desired_path = Path(env_path).expanduser().resolve()
-    else:
-        desired_path = (cwd / "health.db").resolve()
-
-    need_new_engine = desired_path != _engine_path or (env_path is None and cwd != _engine_cwd)
-
-    if need_new_engine:
-        url = f"sqlite:///{desired_path}"
-        _engine = create_engine(
-            url,
-            connect_args={"check_same_thread": False},
-            echo=False,
-        )
+        return Path(env_path).expanduser().resolve()
+    return (Path.cwd() / "health.db").resolve()
+
+def rebind(path: Optional[Path] = None) -> None:
+    """Point the repository at ``path`` (default: re-resolve from env / cwd).
+
+    Resolved once at import; call this explicitly if the DB location changes
+    at runtime instead of paying a ``getcwd`` on every session. The schema is
+    not touched here; follow up with :func:`init_db`.
+    """
+    global _engine, _SessionLocal, _engine_path
+
+    desired_path = Path(path).resolve() if path is not None else _resolve_db_path()
+    with _bind_lock:
+        if desired_path == _engine_path:
+            return
+        _engine = make_engine(f"sqlite:///{desired_path}")
         _SessionLocal = sessionmaker(bind=_engine, expire_on_commit=False)
-        _engine_cwd = cwd
         _engine_path = desired_path
-        init_db(_engine)
+    invalidate()
+
+_bind_lock = threading.Lock()
+_initialised: set[Path] = set()  # paths init_db() has already prepared
+_engine = _default_engine
+_SessionLocal = _DefaultSessionLocal
+_engine_path = Path(_engine.url.database).resolve()
+rebind()
+
+def _after_fork_in_child() -> None:
+    # Pooled SQLite connections must not be shared with the parent process
+    _engine.dispose(close=False)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def _ensure_schema() -> None:
+    """Run :func:`init_db` once for the bound path if startup did not already.
 
+    Lets scripts and other non-server callers use the repository without an
+    explicit ``init_db()``; afterwards this is a single set lookup.
+    """
+    if _engine_path not in _initialised:
+        init_db()
+
+@contextmanager
+def session_scope():
+    """Provide a transactional scope around a series of operations."""
+    _ensure_schema()
     db = _SessionLocal()
     try:
         yield db
@@ -66,55 +130,145 @@ def session_scope():
     finally:
         db.close()
 
+def _notes_user_id(notes: Optional[str]) -> Optional[str]:
+    """Extract ``user_id`` from a row's notes JSON, if present."""
+    try:
+        notes_obj = json.loads(notes) if notes else {}
+    except Exception:
+        notes_obj = {}
+    return notes_obj.get("user_id") if isinstance(notes_obj, dict) else None
+
+_LOG_FIELDS = tuple(SymptomLog.model_fields)
+
+def _row_values(log: SymptomLog) -> dict:
+    """Column values for ``log``, with ``user_id`` lifted out of the notes JSON.
+
+    Reads the attributes directly; ``model_dump`` would build the same dict
+    through the serializer.
+    """
+    values = {name: getattr(log, name) for name in _LOG_FIELDS}
+    values["user_id"] = _notes_user_id(log.notes)
+    return values
+
 # ---------- CRUD -----------------------------------------------------
 
 def add_log(log: SymptomLog) -> None:
     """Persist a ``SymptomLog`` instance."""
-    with session_scope() as db:
-        db.add(SymptomLogORM(**log.model_dump()))
+    add_logs([log])
 
-def list_logs(
+def add_logs(logs: Iterable[SymptomLog]) -> None:
+    """Persist many ``SymptomLog`` instances in one multi-row INSERT / commit.
+
+    This is a Core ``insert()``, so ORM events do not fire; the schema has no
+    relationships or hooks that depend on them. It runs on a pooled connection
+    directly, so no ``Session`` (identity map, autoflush state) is built.
+    """
+    global _write_epoch
+    rows = [_row_values(log) for log in logs]
+    if not rows:
+        return
+    _ensure_schema()
+    with _engine.begin() as conn:
+        conn.execute(insert(SymptomLogORM), rows)
+    with _log_cache_lock:
+        _write_epoch += 1
+        for row in rows:
+            _log_cache.pop(row["id"], None)
+
+def iter_logs(
     user_id: Optional[str] = None,
     since: Optional[datetime] = None,
-) -> List[SymptomLog]:
+    batch_size: int = 500,
+) -> Iterator[SymptomLog]:
     """
-    List logs with optional filters.
+    Yield logs with optional filters, fetching ``batch_size`` rows at a time.
 
     Args:
-        user_id: If provided, only return rows whose notes JSON has {"user_id": <user_id>}.
-        since:   If provided, only return rows with created_at >= since.
+        user_id: If provided, only return rows owned by this user.
+        since:   If provided, only return rows started or created at/after since.
 
-    Note:
-        We do not have a dedicated user_id column yet, so we read user_id
-        from the notes JSON (if present). This preserves the behavior that
-        existed in db/health_db.py::get_entries.
+    Both filters run in SQL; ``user_id`` uses the indexed column that mirrors
+    the ``{"user_id": ...}`` key of the notes JSON. The session stays open
+    until the generator is exhausted or closed.
     """
+    stmt = select(SymptomLogORM)
+    if user_id is not None:
+        stmt = stmt.where(SymptomLogORM.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(
+            or_(SymptomLogORM.started_at >= since, SymptomLogORM.created_at >= since)
+        )
+
     with session_scope() as db:
-        q = db.query(SymptomLogORM)
-        if since is not None:
-            q = q.filter(SymptomLogORM.created_at >= since)
+        rows = db.scalars(stmt.execution_options(yield_per=batch_size))
+        for row in rows:
+            yield SymptomLog.from_orm_fast(row)
+            db.expunge(row)  # keep the identity map to one window of rows
 
-        rows: Iterable[SymptomLogORM] = q.all()
-        results: List[SymptomLog] = []
+def list_logs(
+    user_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+) -> List[SymptomLog]:
+    """List logs with optional filters; see :func:`iter_logs`.
 
-        for row in rows:
-            if user_id is not None:
-                try:
-                    notes_obj = json.loads(row.notes) if row.notes else {}
-                except Exception:
-                    notes_obj = {}
-                if notes_obj.get("user_id") != user_id:
-                    continue
+    Results are cached for ``_LIST_CACHE_TTL`` seconds until the next write
+    through this module. The returned models are shared: do not mutate them.
+    """
+    with _log_cache_lock:
+        key = (user_id, since, _write_epoch)
+        cached = _list_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < _LIST_CACHE_TTL:
+            _list_cache.move_to_end(key)
+            return list(cached[1])
 
-            results.append(SymptomLog.model_validate(row, from_attributes=True))
+    logs = list(iter_logs(user_id=user_id, since=since))
 
-        return results
+    with _log_cache_lock:
+        _list_cache[key] = (time.monotonic(), logs)
+        if len(_list_cache) > _LIST_CACHE_SIZE:
+            _list_cache.popitem(last=False)
+    return list(logs)
 
 def get_log(log_id: str) -> SymptomLog | None:
+    """Fetch one log by id, served from a bounded LRU cache when possible.
+
+    Misses are not cached, so a row inserted later is picked up on the next call.
+    """
+    with _log_cache_lock:
+        cached = _log_cache.get(log_id)
+        if cached is not None:
+            _log_cache.move_to_end(log_id)
+            return cached.model_copy()
+
     with session_scope() as db:
         row = db.get(SymptomLogORM, log_id)
+        if not row:
+            return None
+        log = SymptomLog.from_orm_fast(row)
+
+    with _log_cache_lock:
+        _log_cache[log_id] = log
+        if len(_log_cache) > _LOG_CACHE_SIZE:
+            _log_cache.popitem(last=False)
+    return log.model_copy()
+
+
+def _truncate_all() -> None:
+    """Delete every row and reset the caches (test helper)."""
+    with session_scope() as db:
+        db.execute(delete(SymptomLogORM))
+    invalidate()
+
+
+def latest_entry_id(user_id: str) -> Optional[str]:
+    """Return the id of the most recently created log for ``user_id``."""
+    with session_scope() as db:
         return (
-            SymptomLog.model_validate(row, from_attributes=True) if row else None
+            db.query(SymptomLogORM.id)
+            .filter(SymptomLogORM.user_id == user_id)
+            .order_by(SymptomLogORM.created_at.desc())
+            .limit(1)
+            .scalar()
         )
 
 
@@ -1,7 +1,14 @@
 from __future__ import annotations
-from typing import Iterable, List
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
 from llama_index.core import Document, StorageContext, VectorStoreIndex, load_index_from_storage
+from llama_index.core.schema import NodeRelationship, TextNode
 from llama_index.embeddings.openai import OpenAIEmbedding
+from tools.llm import get_embedding
 from tools.health_schema import SymptomLog
 from db.repository import get_entries
 import os, json, pathlib
@@ -10,6 +17,29 @@ BASE_DIR = pathlib.Path(__file__).resolve().parents[1]
 INDEX_ROOT = BASE_DIR / "storage" / "index"
 INDEX_ROOT.mkdir(parents=True, exist_ok=True)
 
+logger = logging.getLogger(__name__)
+
+# Seconds to coalesce index writes before persisting; 0 persists on every upsert
+PERSIST_DEBOUNCE_S = float(os.getenv("INDEX_PERSIST_DEBOUNCE", "5"))
+
+# Loaded indexes, most recently used last; inserts mutate them in place
+_INDEX_CACHE_SIZE = 128
+_index_cache: "OrderedDict[str, VectorStoreIndex]" = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+# user_id -> (in-memory index with unpersisted inserts, its persist dir)
+_dirty: Dict[str, Tuple[VectorStoreIndex, pathlib.Path]] = {}
+_dirty_lock = threading.Lock()
+_user_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+_flush_timer: Optional[threading.Timer] = None
+
+# Written into a user's persist dir once their DB history is fully embedded;
+# an index on disk without it was saved mid-backfill and is topped up on load
+_BACKFILL_MARKER = ".backfilled"
+_BACKFILL_ATTEMPTS = 3
+_BACKFILL_RETRY_S = 2.0
+_backfilling: set = set()
+
 def entry_to_document(e: SymptomLog) -> Document:
     """Convert a SymptomLog to a LlamaIndex Document."""
     # Rich, queryable text:
@@ -31,40 +61,176 @@ def entry_to_document(e: SymptomLog) -> Document:
     }
     return Document(text=text, metadata=metadata, doc_id=e.id)
 
+def entry_to_node(e: SymptomLog) -> TextNode:
+    """Single node for ``e``; entries are far below one chunk, so no splitting is needed."""
+    doc = entry_to_document(e)
+    return TextNode(
+        text=doc.text,
+        metadata=doc.metadata,
+        relationships={NodeRelationship.SOURCE: doc.as_related_node_info()},
+    )
+
 def _persist_dir(user_id: str) -> pathlib.Path:
     d = INDEX_ROOT / user_id
     d.mkdir(parents=True, exist_ok=True)
     return d
 
 def _embedding() -> OpenAIEmbedding:
-    # relies on OPENAI_API_KEY in env
-    return OpenAIEmbedding(model="text-embedding-3-small")
+    # relies on OPENAI_API_KEY in env; shared and batched (see tools.llm)
+    return get_embedding("text-embedding-3-small")
+
+def build_or_load_index(user_id: str, backfill: bool = True) -> VectorStoreIndex:
+    """Load index for user if exists; otherwise build from DB entries and persist.
+
+    Indexes are kept in a per-process LRU so repeat calls skip the JSON reload.
+    One with inserts still waiting to be persisted is always served from
+    memory, even if evicted, since the copy on disk is behind it.
+
+    With ``backfill=False`` a user without an index gets an empty one right
+    away and their history is embedded on a background thread instead. The
+    same background pass reruns for an index persisted before it finished.
+    """
+    with _index_cache_lock:
+        index = _index_cache.get(user_id)
+        if index is not None:
+            _index_cache.move_to_end(user_id)
+            return index
+    with _dirty_lock:
+        pending = _dirty.get(user_id)
+    if pending is not None:
+        return _cache_index(user_id, pending[0])
 
-def build_or_load_index(user_id: str) -> VectorStoreIndex:
-    """Load index for user if exists; otherwise build from DB entries and persist."""
     persist_dir = _persist_dir(user_id)
     if any(persist_dir.iterdir()):
         storage_ctx = StorageContext.from_defaults(persist_dir=persist_dir)
-        return load_index_from_storage(storage_ctx)
+        index = _cache_index(user_id, load_index_from_storage(storage_ctx, embed_model=_embedding()))
+        if not (persist_dir / _BACKFILL_MARKER).exists():
+            _start_backfill(user_id)
+        return index
+    if not backfill:
+        index = _cache_index(user_id, VectorStoreIndex([], embed_model=_embedding()))
+        _start_backfill(user_id)
+        return index
     # Build fresh
     entries: List[SymptomLog] = get_entries(user_id=user_id, since=None)
     docs = [entry_to_document(e) for e in entries]
-    index = VectorStoreIndex.from_documents(docs, embed_model=_embedding())
+    index = VectorStoreIndex.from_documents(docs, embed_model=_embedding(), show_progress=False)
     index.storage_context.persist(persist_dir=persist_dir)
+    (persist_dir / _BACKFILL_MARKER).touch()
+    return _cache_index(user_id, index)
+
+def _start_backfill(user_id: str) -> None:
+    """Run :func:`_backfill_index` on a daemon thread unless one is already running."""
+    with _dirty_lock:
+        if user_id in _backfilling:
+            return
+        _backfilling.add(user_id)
+    threading.Thread(target=_backfill_index, args=(user_id,), daemon=True).start()
+
+def _backfill_index(user_id: str) -> None:
+    """Embed the user's stored entries that are not in their index yet, with retries.
+
+    If every attempt fails the in-memory index is dropped, so the next caller
+    reloads it (or starts empty) and kicks off a fresh backfill.
+    """
+    try:
+        for attempt in range(1, _BACKFILL_ATTEMPTS + 1):
+            try:
+                _backfill_once(user_id)
+                return
+            except Exception:
+                if attempt == _BACKFILL_ATTEMPTS:
+                    logger.exception("Index backfill failed for user %s", user_id)
+                    _evict_index(user_id)
+                    return
+                logger.warning(
+                    "Index backfill attempt %d failed for user %s", attempt, user_id, exc_info=True
+                )
+                time.sleep(_BACKFILL_RETRY_S * attempt)
+    finally:
+        with _dirty_lock:
+            _backfilling.discard(user_id)
+
+def _backfill_once(user_id: str) -> None:
+    entries = get_entries(user_id=user_id, since=None)
+    with _user_locks[user_id]:
+        index = build_or_load_index(user_id)
+        known = set(index.ref_doc_info)
+        nodes = [entry_to_node(e) for e in entries if e.id not in known]
+        if nodes:
+            index.insert_nodes(nodes)
+        # Persist right away so the marker never gets ahead of what is on disk
+        persist_dir = _persist_dir(user_id)
+        with _dirty_lock:
+            _dirty.pop(user_id, None)
+        index.storage_context.persist(persist_dir=persist_dir)
+        (persist_dir / _BACKFILL_MARKER).touch()
+
+def _evict_index(user_id: str) -> None:
+    """Forget the in-memory index and its pending inserts; the DB still has them."""
+    with _user_locks[user_id]:
+        with _index_cache_lock:
+            _index_cache.pop(user_id, None)
+        with _dirty_lock:
+            _dirty.pop(user_id, None)
+
+def _cache_index(user_id: str, index: VectorStoreIndex) -> VectorStoreIndex:
+    """Cache ``index`` unless another thread got there first; return the cached one."""
+    with _index_cache_lock:
+        index = _index_cache.setdefault(user_id, index)
+        _index_cache.move_to_end(user_id)
+        if len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
     return index
 
 def add_entry_to_index(user_id: str, entry: SymptomLog) -> None:
     """Append a single entry to an existing (or new) user index and persist."""
-    index = build_or_load_index(user_id)  # loads or builds
-    index.insert(entry_to_document(entry))
-    index.storage_context.persist(persist_dir=_persist_dir(user_id))
+    upsert_entries(user_id, [entry])
 
 
 def upsert_entries(user_id: str, entries: Iterable[SymptomLog]) -> None:
-    index = build_or_load_index(user_id)
-    for e in entries:
-        index.insert(entry_to_document(e))
-    index.storage_context.persist(persist_dir=_persist_dir(user_id))
+    """Add ``entries`` to the user's index with one batched embedding call, then persist."""
+    nodes = [entry_to_node(e) for e in entries]
+    if not nodes:
+        return
+    with _user_locks[user_id]:
+        # First write for a user: don't embed their whole history inline
+        index = build_or_load_index(user_id, backfill=False)
+        index.insert_nodes(nodes)
+        if PERSIST_DEBOUNCE_S <= 0:
+            index.storage_context.persist(persist_dir=_persist_dir(user_id))
+            return
+        _mark_dirty(user_id, index, _persist_dir(user_id))
+
+
+def _mark_dirty(user_id: str, index: VectorStoreIndex, persist_dir: pathlib.Path) -> None:
+    """Queue ``index`` for persistence, starting the debounce timer if idle."""
+    global _flush_timer
+    with _dirty_lock:
+        _dirty[user_id] = (index, persist_dir)
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(PERSIST_DEBOUNCE_S, flush_indexes)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def flush_indexes() -> None:
+    """Persist every index with pending inserts (runs on the timer and at exit)."""
+    global _flush_timer
+    with _dirty_lock:
+        _flush_timer = None
+        user_ids = list(_dirty)
+    for user_id in user_ids:
+        # The user lock keeps inserts out while the JSON stores are written
+        with _user_locks[user_id]:
+            with _dirty_lock:
+                pending = _dirty.pop(user_id, None)
+            if pending is not None:
+                index, persist_dir = pending
+                index.storage_context.persist(persist_dir=persist_dir)
+
+
+atexit.register(flush_indexes)
 
 def query_index(user_id: str, question: str, k: int = 8):
     """Return top-k retrieved nodes’ text+metadata for a question."""
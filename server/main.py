@@ -3,20 +3,38 @@ from __future__ import annotations
 
 import logging
 import os
+import sys
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Optional, Any
+from typing import Any, Callable, Optional
 
 from fastapi import FastAPI, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
-# Import tools lazily to avoid circular imports at module import time
-from tools.log_entry import log_entry as tool_log_entry
-from tools.get_entries import get_entries as tool_get_entries
-from tools.summarize import summarize as tool_summarize
+from db.repository import init_db
+from server.responses import ORJSONResponse
+from tools.health_schema import SymptomLog
 
-app = FastAPI(title="HealthTrack-AI API", version="0.1.0")
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    # Create tables once at startup rather than when db modules are imported
+    await run_in_threadpool(init_db)
+    yield
+    # LLM connections are pooled per event loop; release this loop's pool if
+    # a handler has loaded the LLM tools (they are imported lazily)
+    if "tools.llm" in sys.modules:
+        await sys.modules["tools.llm"].aclose_http_pool()
+
+app = FastAPI(
+    title="HealthTrack-AI API",
+    version="0.1.0",
+    lifespan=_lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # --- CORS (configurable) ---
 def _parse_cors_origins(env_val: str | None):
@@ -37,6 +55,7 @@ app.add_middleware(
     allow_credentials=False,   # using Bearer token; no cookies needed
     allow_methods=["*"],
     allow_headers=["*"],       # includes 'Authorization'
+    max_age=86400,             # let browsers cache preflights for a day
 )
 
 logger = logging.getLogger(__name__)
@@ -49,8 +68,12 @@ else:
 security = HTTPBearer(auto_error=False)
 API_TOKEN = os.getenv("API_TOKEN")
 
-def auth_guard(creds: Optional[HTTPAuthorizationCredentials] = Depends(security)):
-    """Allow all if API_TOKEN not set (dev). Otherwise require matching Bearer token."""
+async def auth_guard(creds: Optional[HTTPAuthorizationCredentials] = Depends(security)):
+    """Allow all if API_TOKEN not set (dev). Otherwise require matching Bearer token.
+
+    Declared ``async`` so this pure comparison runs on the event loop instead of
+    costing a threadpool hop per request.
+    """
     if not API_TOKEN:
         return True
     if creds is None or creds.scheme.lower() != "bearer" or creds.credentials != API_TOKEN:
@@ -58,41 +81,74 @@ def auth_guard(creds: Optional[HTTPAuthorizationCredentials] = Depends(security)
     return True
 
 # --- Helpers ---
-def _ensure_aware(dt: datetime) -> datetime:
-    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
-
 def _parse_since(since_str: Optional[str]) -> Optional[datetime]:
     if not since_str:
         return None
     try:
         # Accept ISO 8601; assume UTC if no tzinfo present
-        dt = datetime.fromisoformat(since_str.replace("Z", "+00:00"))
-        return _ensure_aware(dt)
+        dt = datetime.fromisoformat(since_str)  # 3.11+ accepts a "Z" suffix
+        return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
     except Exception:
         # Bad input → 400
         raise HTTPException(status_code=400, detail="Invalid 'since' datetime format. Use ISO 8601.")
 
-def _to_jsonable(obj: Any) -> Any:
-    """Best-effort conversion for Pydantic v2 models, ORM rows, or plain dicts/lists."""
-    # Pydantic v2 model_dump
-    if hasattr(obj, "model_dump"):
-        return obj.model_dump()
-    # SQLAlchemy row: try __dict__ but strip private keys
-    if hasattr(obj, "__dict__"):
-        d = {k: v for k, v in obj.__dict__.items() if not k.startswith("_")}
-        # Nested pydantic?
-        for k, v in list(d.items()):
-            if hasattr(v, "model_dump"):
-                d[k] = v.model_dump()
-        return d
-    # List/tuple → recurse
-    if isinstance(obj, (list, tuple)):
-        return [_to_jsonable(x) for x in obj]
-    # Dict → pass through
-    if isinstance(obj, dict):
-        return {k: _to_jsonable(v) for k, v in obj.items()}
+def _conv_model(obj: Any) -> Any:
+    return obj.model_dump()
+
+def _conv_object(obj: Any) -> Any:
+    # SQLAlchemy row: use __dict__ but strip private keys; dump nested pydantic
+    d = {k: v for k, v in obj.__dict__.items() if not k.startswith("_")}
+    for k, v in d.items():
+        if hasattr(v, "model_dump"):
+            d[k] = v.model_dump()
+    return d
+
+def _conv_list(obj: Any) -> Any:
+    return [(_DISPATCH.get(type(x)) or _resolve(x))(x) for x in obj]
+
+def _conv_dict(obj: Any) -> Any:
+    return {k: (_DISPATCH.get(type(v)) or _resolve(v))(v) for k, v in obj.items()}
+
+def _identity(obj: Any) -> Any:
     return obj
 
+# type -> converter, filled lazily by _resolve so each type is inspected once
+_DISPATCH: dict[type, Callable[[Any], Any]] = {
+    list: _conv_list,
+    tuple: _conv_list,
+    dict: _conv_dict,
+    str: _identity,
+    int: _identity,
+    float: _identity,
+    bool: _identity,
+    type(None): _identity,
+}
+
+def _resolve(obj: Any) -> Callable[[Any], Any]:
+    """Pick (and cache) the converter for ``type(obj)``, in the original probe order."""
+    if hasattr(obj, "model_dump"):
+        fn = _conv_model
+    elif hasattr(obj, "__dict__"):
+        fn = _conv_object
+    elif isinstance(obj, (list, tuple)):
+        fn = _conv_list
+    elif isinstance(obj, dict):
+        fn = _conv_dict
+    else:
+        fn = _identity
+    _DISPATCH[type(obj)] = fn
+    return fn
+
+_ENTRIES_ADAPTER = TypeAdapter(list[SymptomLog])
+
+def _to_jsonable(obj: Any) -> Any:
+    """Best-effort conversion for Pydantic v2 models, ORM rows, or plain dicts/lists.
+
+    Dispatches on ``type(obj)`` with one dict lookup per value instead of a
+    chain of ``hasattr`` probes.
+    """
+    return (_DISPATCH.get(type(obj)) or _resolve(obj))(obj)
+
 # --- Routes ---
 @app.get("/health")
 def health():
@@ -104,64 +160,98 @@ class LogRequest(BaseModel):
 
 
 @app.post("/log")
-def api_log(payload: LogRequest, _auth=Depends(auth_guard)):
-    saved = tool_log_entry(user_id=payload.user_id, message=payload.message)
-    return _to_jsonable(saved)
+async def api_log(payload: LogRequest, _auth=Depends(auth_guard)):
+    # Tools pull in llama_index: imported on first use, not per worker at boot
+    from tools.log_entry import log_entry as tool_log_entry
+
+    # Tools are blocking (SQLAlchemy + OpenAI); keep them off the event loop
+    saved = await run_in_threadpool(tool_log_entry, user_id=payload.user_id, message=payload.message)
+    # Returned directly so FastAPI skips its jsonable_encoder pass; orjson does datetimes
+    return ORJSONResponse(_to_jsonable(saved))
 
 @app.get("/entries")
-def api_entries(
+async def api_entries(
     user_id: str,
     since: Optional[str] = Query(default=None, description="ISO8601 datetime, UTC assumed if tz missing"),
     _auth=Depends(auth_guard)
 ):
+    from tools.get_entries import get_entries as tool_get_entries
+
     dt = _parse_since(since)
-    entries = tool_get_entries(user_id=user_id, since=dt)
-    return _to_jsonable(entries)
+    entries = await run_in_threadpool(tool_get_entries, user_id=user_id, since=dt)
+    if entries and isinstance(entries[0], SymptomLog):
+        # The common case: dump the whole list in one pydantic-core pass
+        return ORJSONResponse(_ENTRIES_ADAPTER.dump_python(entries))
+    return ORJSONResponse(_to_jsonable(entries))
 
 @app.get("/summary")
-def api_summary(
+async def api_summary(
     user_id: str,
     days: int = Query(default=7, ge=1, le=90),
     question: Optional[str] = Query(default="Summarize my recent symptoms."),
     _auth=Depends(auth_guard)
 ):
-    text = tool_summarize(user_id=user_id, question=question or "Summarize my recent symptoms.", days=days)
+    from tools.summarize import summarize_async as tool_summarize_async
+
+    text = await tool_summarize_async(
+        user_id=user_id,
+        question=question or "Summarize my recent symptoms.",
+        days=days,
+    )
     # summarize returns plain text → wrap for uniform JSON
     return {"summary": str(text)}
 
 
-try:
-    import gradio as gr
-    from gradio.routes import mount_gradio_app
-
-    # Minimal demo UI that calls the API via Python (server-side), not through the browser
-    # If you already have a Blocks in another module, import and replace ui below.
-    def _ui_predict(user_id, text):
-        # Server-side call directly to tools to avoid CORS/auth in demo
-        # If you prefer real HTTP calls from browser, build a client-side fetch instead.
-        from tools.summarize import summarize as tool_summarize
-        from tools.log_entry import log_entry as tool_log_entry
-        from tools.get_entries import get_entries as tool_get_entries
-
-        if text.strip().startswith("/entries"):
-            return str(tool_get_entries(user_id=user_id))
-        if text.strip().startswith("/log"):
-            payload = text.strip()[len("/log"):].strip() or text
-            res = tool_log_entry(user_id=user_id, message=payload)
-            return f"Logged: {getattr(res,'main_symptom',None)}"
-        # default to summarize
-        return str(tool_summarize(user_id=user_id, question=text))
-
-    with gr.Blocks(title="HealthTrack-AI") as ui:
-        gr.Markdown("### HealthTrack-AI — Demo UI  \nTry: `/log Headache 6/10 since 8pm, 2h, took Advil`  ·  `/entries`  ·  `summarize last 7 days`")
-        uid = gr.Textbox(label="User ID", value="u1")
-        inp = gr.Textbox(label="Message", placeholder="Type a note or command...")
-        out = gr.Textbox(label="Response")
-        btn = gr.Button("Send")
-        btn.click(_ui_predict, inputs=[uid, inp], outputs=[out])
-
-    # Mount at /ui
-    app = mount_gradio_app(app, ui, path="/ui")
-except Exception:
-    # Gradio not installed or mounting failed; API still works
-    pass
+# DISABLE_UI=1 keeps API-only workers from importing Gradio at all
+if not os.getenv("DISABLE_UI"):
+    try:
+        import gradio as gr
+        from gradio.routes import mount_gradio_app
+
+        import asyncio
+        import functools
+        from concurrent.futures import ThreadPoolExecutor
+
+        @functools.lru_cache(maxsize=1)
+        def _ui_tools():
+            # Resolved on the first UI call, like the API handlers, so mounting
+            # the demo UI doesn't pull in llama-index at startup
+            from tools.get_entries import get_entries
+            from tools.log_entry import log_entry
+            from tools.summarize import summarize_async
+
+            return get_entries, log_entry, summarize_async
+
+        # Bounded pool for the blocking DB tools so slow clicks don't queue behind each other
+        _UI_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ui-tools")
+
+        # Minimal demo UI that calls the API via Python (server-side), not through the browser
+        # If you already have a Blocks in another module, import and replace ui below.
+        async def _ui_predict(user_id, text):
+            # Server-side call directly to tools to avoid CORS/auth in demo
+            # If you prefer real HTTP calls from browser, build a client-side fetch instead.
+            tool_get_entries, tool_log_entry, tool_summarize_async = _ui_tools()
+            loop = asyncio.get_running_loop()
+            if text.strip().startswith("/entries"):
+                entries = await loop.run_in_executor(_UI_POOL, tool_get_entries, user_id)
+                return str(entries)
+            if text.strip().startswith("/log"):
+                payload = text.strip()[len("/log"):].strip() or text
+                res = await loop.run_in_executor(_UI_POOL, tool_log_entry, user_id, payload)
+                return f"Logged: {getattr(res,'main_symptom',None)}"
+            # default to summarize
+            return str(await tool_summarize_async(user_id=user_id, question=text))
+
+        with gr.Blocks(title="HealthTrack-AI") as ui:
+            gr.Markdown("### HealthTrack-AI — Demo UI  \nTry: `/log Headache 6/10 since 8pm, 2h, took Advil`  ·  `/entries`  ·  `summarize last 7 days`")
+            uid = gr.Textbox(label="User ID", value="u1")
+            inp = gr.Textbox(label="Message", placeholder="Type a note or command...")
+            out = gr.Textbox(label="Response")
+            btn = gr.Button("Send")
+            btn.click(_ui_predict, inputs=[uid, inp], outputs=[out])
+
+        # Mount at /ui
+        app = mount_gradio_app(app, ui, path="/ui")
+    except Exception:
+        # Gradio not installed or mounting failed; API still works
+        pass
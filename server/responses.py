@@ -0,0 +1,37 @@
+"""Shared response classes for the API apps."""
+from __future__ import annotations
+
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+_ORJSON_OPTS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson.
+
+    orjson encodes ``datetime`` / ``Enum`` values natively in C, so payloads can
+    be handed over without a Python-level ``isoformat()`` pass. Naive datetimes
+    are treated as UTC, matching the rest of the app.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=_ORJSON_OPTS)
+
+
+def iter_json_array(rows: Iterable[Any], chunk_rows: int = 256) -> Iterator[bytes]:
+    """Encode ``rows`` as a JSON array, yielding one chunk per ``chunk_rows`` rows.
+
+    Meant for ``StreamingResponse``: sync iterators are pulled through the
+    threadpool once per chunk, so rows are grouped rather than sent one by one.
+    """
+    it = iter(rows)
+    sep = b"["
+    while batch := list(islice(it, chunk_rows)):
+        yield sep + b",".join(orjson.dumps(row, option=_ORJSON_OPTS) for row in batch)
+        sep = b","
+    yield b"]" if sep == b"," else b"[]"
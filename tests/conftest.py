@@ -0,0 +1,36 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make the project packages importable from tests without per-file path hacks
+_ROOT = str(Path(__file__).resolve().parents[1])
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+
+def pytest_sessionstart(session):
+    # Point the DB at a session-wide file before db.repository is first imported;
+    # under pytest-xdist each worker gets its own file
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    os.environ["HEALTH_DB_PATH"] = str(Path(session.config.cache.mkdir("db")) / f"health-{worker}.db")
+
+
+@pytest.fixture
+def repo():
+    """The repository module on an empty, initialised test database."""
+    from db import repository
+
+    repository.init_db()
+    repository._truncate_all()
+    return repository
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _dispose_engine():
+    """Close the repository's pooled connections once the session is done."""
+    yield
+    from db import repository
+
+    repository._engine.dispose()
@@ -1,96 +1,130 @@
 from datetime import datetime, timezone
-import importlib
-from pathlib import Path
-import sys
 
 import pytest
-from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import server.main as server_main
 
-# We import the server AFTER monkeypatching env when needed
+_TS_LOG = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc).isoformat()
+_TS_FEVER = datetime(2025, 1, 2, 9, 0, tzinfo=timezone.utc).isoformat()
+_TS_COUGH = datetime(2025, 1, 1, 9, 0, tzinfo=timezone.utc).isoformat()
+
+# What the fakes were called with, keyed by tool name; cleared before each test
+_CALLS: dict = {}
+
+
+def _fake_log(user_id, message):
+    return {"user_id": user_id, "main_symptom": "headache", "severity": 6,
+            "timestamp": _TS_LOG, "notes": message}
+
+
+def _fake_get_entries(user_id, since=None):
+    # record what we received for assertions
+    _CALLS["get_entries"] = {"user_id": user_id, "since": since}
+    # return two rows
+    return [
+        {"user_id": user_id, "main_symptom": "fever", "severity": 4, "timestamp": _TS_FEVER},
+        {"user_id": user_id, "main_symptom": "cough", "severity": 2, "timestamp": _TS_COUGH},
+    ]
+
+
+def _fake_summarize(user_id, question="Summarize my recent symptoms.", days=7):
+    return f"Summary for {user_id}: {question} (last {days} days)"
+
+
+async def _fake_summarize_async(user_id, question="Summarize my recent symptoms.", days=7):
+    return _fake_summarize(user_id, question=question, days=days)
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    _CALLS.clear()
+    yield
+
+
+# server.main is imported once; each test patches its token and the tool
+# functions it imports per request, so no reload is needed.
 def make_app(monkeypatch, api_token=None, fakes=None):
-    if api_token is not None:
-        monkeypatch.setenv("API_TOKEN", api_token)
-    else:
-        monkeypatch.delenv("API_TOKEN", raising=False)
+    monkeypatch.setattr(server_main, "API_TOKEN", api_token)
 
     # Default fakes if not provided
     fakes = fakes or {}
 
-    # Build fake tool functions
-    fake_log = fakes.get("log_entry") or (lambda user_id, message: {
-        "user_id": user_id, "main_symptom": "headache", "severity": 6,
-        "timestamp": datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc).isoformat(),
-        "notes": message
-    })
-
-    def fake_entries(user_id, since=None):
-        # record what we received for assertions
-        fake_entries.called_with = {"user_id": user_id, "since": since}
-        # return two rows
-        return [
-            {"user_id": user_id, "main_symptom": "fever", "severity": 4,
-             "timestamp": datetime(2025, 1, 2, 9, 0, tzinfo=timezone.utc).isoformat()},
-            {"user_id": user_id, "main_symptom": "cough", "severity": 2,
-             "timestamp": datetime(2025, 1, 1, 9, 0, tzinfo=timezone.utc).isoformat()},
-        ]
-
-    fake_sum = fakes.get("summarize") or (lambda user_id, question="Summarize my recent symptoms.", days=7:
-                                          f"Summary for {user_id}: {question} (last {days} days)")
-
-    # Monkeypatch tool entrypoints before importing the app
+    # server.main imports the tools inside each handler, so the module
+    # attribute is the use site: patching it is seen on the next request
     import tools.get_entries as ge
     import tools.log_entry as le
     import tools.summarize as su
-    monkeypatch.setattr(le, "log_entry", fake_log, raising=True)
-    monkeypatch.setattr(ge, "get_entries", fake_entries, raising=True)
-    monkeypatch.setattr(su, "summarize", fake_sum, raising=True)
+    monkeypatch.setattr(le, "log_entry", fakes.get("log_entry") or _fake_log, raising=True)
+    monkeypatch.setattr(ge, "get_entries", _fake_get_entries, raising=True)
+    monkeypatch.setattr(su, "summarize", fakes.get("summarize") or _fake_summarize, raising=True)
+    monkeypatch.setattr(su, "summarize_async", _fake_summarize_async, raising=True)
+
+    return server_main.app, _CALLS
+
+
+# Tests run on anyio's pytest plugin (shipped with anyio), asyncio backend only
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    return "asyncio"
 
-    # Import / reload server after patches so it sees the fakes & env
-    server_main = importlib.import_module("server.main")
-    importlib.reload(server_main)
-    return server_main.app, fake_entries
+
+@pytest.fixture(scope="module")
+async def client():
+    """One in-process AsyncClient for the module; ``make_app`` patches state per test.
+
+    ASGITransport does not send lifespan events, so the app's startup runs
+    here, once for the whole module.
+    """
+    app = server_main.app
+    transport = ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=transport, base_url="http://test") as c:
+            yield c
 
 
 @pytest.fixture
-def client_no_auth(monkeypatch):
-    app, _ = make_app(monkeypatch, api_token=None)
-    return TestClient(app)
+def client_no_auth(monkeypatch, client):
+    make_app(monkeypatch, api_token=None)
+    return client
 
 
 @pytest.fixture
-def client_with_auth(monkeypatch):
-    app, _ = make_app(monkeypatch, api_token="secrettoken")
-    return TestClient(app)
+def client_with_auth(monkeypatch, client):
+    make_app(monkeypatch, api_token="secrettoken")
+    return client
 
 
-def test_health(client_no_auth):
-    r = client_no_auth.get("/health")
+async def test_health(client_no_auth):
+    r = await client_no_auth.get("/health")
     assert r.status_code == 200
     assert r.json() == {"ok": True}
 
 
-def test_auth_disabled_allows_requests(client_no_auth):
-    r = client_no_auth.get("/entries", params={"user_id": "u1"})
+async def test_auth_disabled_allows_requests(client_no_auth):
+    r = await client_no_auth.get("/entries", params={"user_id": "u1"})
     assert r.status_code == 200
 
 
-def test_auth_enabled_blocks_without_header(client_with_auth):
-    r = client_with_auth.get("/entries", params={"user_id": "u1"})
-    assert r.status_code == 401
-
-
-def test_auth_enabled_allows_with_header(monkeypatch):
-    app, _ = make_app(monkeypatch, api_token="secrettoken")
-    client = TestClient(app)
-    r = client.get("/entries", params={"user_id": "u1"}, headers={"Authorization": "Bearer secrettoken"})
-    assert r.status_code == 200
+@pytest.mark.parametrize(
+    "headers,expected",
+    [
+        ({}, 401),
+        ({"Authorization": "Bearer wrongtoken"}, 401),
+        ({"Authorization": "Bearer secrettoken"}, 200),
+    ],
+)
+async def test_auth_enabled(client_with_auth, headers, expected):
+    r = await client_with_auth.get("/entries", params={"user_id": "u1"}, headers=headers)
+    assert r.status_code == expected
 
 
-def test_post_log_returns_json(client_no_auth):
+async def test_post_log_returns_json(client_no_auth):
     payload = {"user_id": "u1", "message": "Headache 6/10 since 8pm"}
-    r = client_no_auth.post("/log", json=payload)
+    r = await client_no_auth.post("/log", json=payload)
     assert r.status_code == 200
     body = r.json()
     assert body["user_id"] == "u1"
@@ -98,27 +132,25 @@ def test_post_log_returns_json(client_no_auth):
     assert "timestamp" in body
 
 
-def test_entries_passes_since_as_tzaware(monkeypatch):
-    app, fake_entries = make_app(monkeypatch, api_token=None)
-    client = TestClient(app)
-    r = client.get("/entries", params={"user_id": "u1", "since": "2025-01-01T00:00:00"})
+async def test_entries_passes_since_as_tzaware(monkeypatch, client):
+    _, calls = make_app(monkeypatch, api_token=None)
+    r = await client.get("/entries", params={"user_id": "u1", "since": "2025-01-01T00:00:00"})
     assert r.status_code == 200
     # Assert the tool was called with tz-aware datetime
-    called = fake_entries.called_with
+    called = calls["get_entries"]
     assert called["user_id"] == "u1"
     assert isinstance(called["since"], datetime)
     assert called["since"].tzinfo is not None
 
 
-def test_entries_bad_since_returns_400(monkeypatch):
-    app, _ = make_app(monkeypatch, api_token=None)
-    client = TestClient(app)
-    r = client.get("/entries", params={"user_id": "u1", "since": "not-a-date"})
+async def test_entries_bad_since_returns_400(monkeypatch, client):
+    make_app(monkeypatch, api_token=None)
+    r = await client.get("/entries", params={"user_id": "u1", "since": "not-a-date"})
     assert r.status_code == 400
 
 
-def test_summary_returns_text_field(client_no_auth):
-    r = client_no_auth.get("/summary", params={"user_id": "u1", "days": 7})
+async def test_summary_returns_text_field(client_no_auth):
+    r = await client_no_auth.get("/summary", params={"user_id": "u1", "days": 7})
     assert r.status_code == 200
     j = r.json()
     assert "summary" in j
@@ -0,0 +1,49 @@
+import importlib
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from tools.health_schema import SymptomLog
+
+pytestmark = pytest.mark.anyio
+
+_USER = "u-stream"
+_START = datetime(2025, 1, 1, 8, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    # API only: app.py mounts Gradio at import unless DISABLE_UI is set
+    monkeypatch.setenv("DISABLE_UI", "1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    return importlib.import_module("app")
+
+
+async def test_streamed_entries_match_buffered(monkeypatch, repo, app_module):
+    notes = json.dumps({"user_id": _USER})
+    repo.add_logs(
+        SymptomLog(symptom=f"s{i}", severity="mild", started_at=_START + timedelta(hours=i), notes=notes)
+        for i in range(7)
+    )
+
+    transport = ASGITransport(app=app_module.fastapi_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        buffered = await client.get("/api/entries", params={"user_id": _USER})
+        monkeypatch.setattr(app_module, "ENTRIES_STREAM_THRESHOLD", 3)
+        streamed = await client.get("/api/entries", params={"user_id": _USER})
+
+    assert buffered.status_code == streamed.status_code == 200
+    # StreamingResponse sends no Content-Length, ORJSONResponse always does
+    assert "content-length" in buffered.headers
+    assert "content-length" not in streamed.headers
+
+    rows = json.loads(streamed.text)
+    assert len(rows) == 7
+    assert rows == buffered.json()
@@ -1,18 +1,8 @@
-import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-
 from zoneinfo import ZoneInfo
 from tools.health_schema import Severity, SymptomLog, natural_language_to_datetime
 
 
-def test_repo_roundtrip(tmp_path, monkeypatch):
-    # Use a temporary database for isolation
-    monkeypatch.setenv("HEALTH_DB_PATH", str(tmp_path / "health.db"))
-    import importlib
-    from db import repository as repo
-    importlib.reload(repo)
-
+def test_repo_roundtrip(repo):
     # Create a sample log
     dt = natural_language_to_datetime("2024-07-01 08:00", user_tz="America/New_York")
     log = SymptomLog(
@@ -35,3 +25,150 @@ def test_repo_roundtrip(tmp_path, monkeypatch):
     assert roundtrip.started_at.tzinfo is ZoneInfo("UTC")
     # duration property
     assert roundtrip.duration is None
+
+
+def test_list_logs_since_filters_in_sql(repo):
+    old = SymptomLog(
+        symptom="cough",
+        severity="mild",
+        started_at="2024-01-01 08:00 UTC",
+        created_at=natural_language_to_datetime("2024-01-01 09:00"),
+    )
+    new = SymptomLog(
+        symptom="fever",
+        severity="mild",
+        started_at="2024-07-01 08:00 UTC",
+        created_at=natural_language_to_datetime("2024-07-01 09:00"),
+    )
+    repo.add_log(old)
+    repo.add_log(new)
+
+    since = natural_language_to_datetime("2024-06-01 00:00")
+    logs = repo.list_logs(since=since)
+    assert [l.symptom for l in logs] == ["fever"]
+
+
+def test_latest_entry_id_is_per_user(repo):
+    import json
+
+    assert repo.latest_entry_id("u1") is None
+
+    first = SymptomLog(
+        symptom="cough",
+        severity="mild",
+        started_at="2024-01-01 08:00 UTC",
+        created_at=natural_language_to_datetime("2024-01-01 09:00"),
+        notes=json.dumps({"user_id": "u1"}),
+    )
+    second = SymptomLog(
+        symptom="fever",
+        severity="mild",
+        started_at="2024-07-01 08:00 UTC",
+        created_at=natural_language_to_datetime("2024-07-01 09:00"),
+        notes=json.dumps({"user_id": "u2"}),
+    )
+    repo.add_log(first)
+    repo.add_log(second)
+
+    assert repo.latest_entry_id("u1") == first.id
+    assert repo.latest_entry_id("u2") == second.id
+
+
+def test_get_log_is_cached_until_invalidated(repo):
+    log = SymptomLog(symptom="cough", severity="mild", started_at="2024-01-01 08:00 UTC")
+    assert repo.get_log(log.id) is None  # misses are not cached
+    repo.add_log(log)
+
+    first = repo.get_log(log.id)
+    assert first.symptom == "cough"
+
+    with repo.session_scope() as db:
+        db.get(repo.SymptomLogORM, log.id).symptom = "fever"
+    assert repo.get_log(log.id).symptom == "cough"
+
+    repo.invalidate(log.id)
+    assert repo.get_log(log.id).symptom == "fever"
+
+
+def test_list_logs_cache_is_dropped_on_write(repo):
+    first = SymptomLog(symptom="cough", severity="mild", started_at="2024-01-01 08:00 UTC")
+    repo.add_log(first)
+    assert [l.symptom for l in repo.list_logs()] == ["cough"]
+
+    with repo.session_scope() as db:
+        db.get(repo.SymptomLogORM, first.id).symptom = "fever"
+    assert [l.symptom for l in repo.list_logs()] == ["cough"]  # served from cache
+
+    repo.add_log(SymptomLog(symptom="nausea", severity="mild", started_at="2024-01-02 08:00 UTC"))
+    assert sorted(l.symptom for l in repo.list_logs()) == ["fever", "nausea"]
+
+
+def test_user_id_column_is_backfilled_from_notes(tmp_path):
+    import sqlite3
+    from sqlalchemy import create_engine
+    from db.models import ensure_user_id_column
+
+    db_path = tmp_path / "legacy.db"
+    con = sqlite3.connect(db_path)
+    con.execute("CREATE TABLE symptom_logs (id VARCHAR PRIMARY KEY, notes TEXT)")
+    con.executemany(
+        "INSERT INTO symptom_logs VALUES (?, ?)",
+        [("a", '{"user_id": "u1"}'), ("b", "plain text"), ("c", None)],
+    )
+    con.commit()
+    con.close()
+
+    ensure_user_id_column(create_engine(f"sqlite:///{db_path}"))
+
+    con = sqlite3.connect(db_path)
+    rows = dict(con.execute("SELECT id, user_id FROM symptom_logs").fetchall())
+    con.close()
+    assert rows == {"a": "u1", "b": None, "c": None}
+
+
+def test_started_at_text_is_migrated_to_epoch(tmp_path):
+    import sqlite3
+    from sqlalchemy import create_engine
+    from db.models import ensure_epoch_started_at
+
+    db_path = tmp_path / "legacy.db"
+    con = sqlite3.connect(db_path)
+    con.execute("CREATE TABLE symptom_logs (id VARCHAR PRIMARY KEY, started_at DATETIME)")
+    con.executemany(
+        "INSERT INTO symptom_logs VALUES (?, ?)",
+        [("a", "2024-07-01 12:00:00.000001"), ("b", 1719835200000000)],
+    )
+    con.commit()
+    con.close()
+
+    ensure_epoch_started_at(create_engine(f"sqlite:///{db_path}"))
+
+    con = sqlite3.connect(db_path)
+    rows = dict(con.execute("SELECT id, started_at FROM symptom_logs").fetchall())
+    con.close()
+    assert rows == {"a": 1719835200000001, "b": 1719835200000000}
+
+
+def test_schema_is_created_on_first_use(tmp_path):
+    from db import repository
+
+    original = repository._engine_path
+    repository.rebind(tmp_path / "fresh.db")
+    try:
+        repository.add_log(SymptomLog(symptom="cough", severity="mild", started_at="2024-01-01 08:00 UTC"))
+        assert [l.symptom for l in repository.list_logs()] == ["cough"]
+    finally:
+        repository.rebind(original)
+
+
+def test_per_user_reads_use_the_composite_index(repo):
+    from sqlalchemy import text
+
+    with repo._engine.connect() as conn:
+        names = {row[1] for row in conn.execute(text("PRAGMA index_list('symptom_logs')"))}
+        plan = " ".join(
+            str(row[-1])
+            for row in conn.execute(text("EXPLAIN QUERY PLAN SELECT id FROM symptom_logs WHERE user_id = 'u1'"))
+        )
+    assert "ix_symptom_logs_user_id" not in names
+    assert "ix_symptom_logs_user_created" in plan
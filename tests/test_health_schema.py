@@ -1,7 +1,3 @@
-import sys, os
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-
 import pytest
 from zoneinfo import ZoneInfo
 
@@ -24,6 +20,21 @@ def test_utc_conversion():
     assert log.started_at.hour == 12
 
 
+def test_iso_offset_respected():
+    dt = natural_language_to_datetime("2024-06-30T10:00:00+02:00", user_tz="America/New_York")
+    assert dt.tzinfo == ZoneInfo("UTC")
+    assert dt.hour == 8
+
+
+def test_partial_dates_fill_from_the_users_today():
+    from datetime import date
+    from tools.health_schema import _parse_cached
+
+    tz = ZoneInfo("Pacific/Kiritimati")  # UTC+14: its "today" is often not the host's
+    dt = _parse_cached("3pm", tz, date(2025, 1, 2))
+    assert (dt.date(), dt.hour) == (date(2025, 1, 2), 1)
+
+
 def test_duration_property():
     log = SymptomLog(
         symptom="pain",
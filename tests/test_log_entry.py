@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import pytest
+
+
+def test_log_batcher_coalesces_writes(repo, monkeypatch):
+    import tools.log_entry as le
+
+    indexed = []
+    monkeypatch.setattr(le, "upsert_entries", lambda user_id, entries: indexed.append((user_id, len(entries))))
+
+    inserts = []
+    real_add_logs = repo.add_logs
+
+    def counting_add_logs(logs):
+        logs = list(logs)
+        inserts.append(len(logs))
+        real_add_logs(logs)
+
+    monkeypatch.setattr(repo, "add_logs", counting_add_logs)
+
+    batcher = le.LogBatcher(max_size=8, max_delay_ms=20)
+
+    async def main():
+        entries = await asyncio.gather(
+            *(batcher.submit(user_id=f"u{i % 2}", text=f"headache {i}") for i in range(5))
+        )
+        await batcher.aclose()  # index updates run after the callers resolve
+        return entries
+
+    entries = asyncio.run(main())
+
+    assert [e.symptom for e in entries] == [f"headache {i}" for i in range(5)]
+    assert inserts == [5]
+    assert sorted(indexed) == [("u0", 3), ("u1", 2)]
+    stored = repo.list_logs(user_id="u0")
+    assert len(stored) == 3
+    assert all(json.loads(e.notes)["user_id"] == "u0" for e in stored)
+
+
+def test_tool_log_bulk_uses_one_insert(repo, monkeypatch):
+    import tools.log_entry as le
+
+    indexed = []
+    monkeypatch.setattr(le, "upsert_entries", lambda user_id, entries: indexed.append((user_id, len(entries))))
+
+    inserts = []
+    real_add_logs = repo.add_logs
+
+    def counting_add_logs(logs):
+        logs = list(logs)
+        inserts.append(len(logs))
+        real_add_logs(logs)
+
+    monkeypatch.setattr(repo, "add_logs", counting_add_logs)
+
+    entries = le.tool_log_bulk([("cough", "u1"), ("fever", "u2"), ("nausea", "u1")])
+
+    assert [e.symptom for e in entries] == ["cough", "fever", "nausea"]
+    assert inserts == [3]
+    assert sorted(indexed) == [("u1", 2), ("u2", 1)]
+    assert sorted(e.symptom for e in repo.list_logs(user_id="u1")) == ["cough", "nausea"]
+
+
+def test_log_batcher_isolates_index_failures(repo, monkeypatch):
+    import tools.log_entry as le
+
+    indexed = []
+
+    def flaky_upsert(user_id, entries):
+        if user_id == "bad":
+            raise RuntimeError("index down")
+        indexed.append(user_id)
+
+    monkeypatch.setattr(le, "upsert_entries", flaky_upsert)
+    batcher = le.LogBatcher(max_size=8, max_delay_ms=20)
+
+    async def main():
+        entries = await asyncio.gather(
+            batcher.submit(user_id="bad", text="cough"),
+            batcher.submit(user_id="good", text="fever"),
+        )
+        await batcher.aclose()
+        return entries
+
+    bad, good = asyncio.run(main())
+
+    # Both rows committed, so both callers succeed; only the index update failed
+    assert (bad.symptom, good.symptom) == ("cough", "fever")
+    assert indexed == ["good"]
+    # The insert committed before indexing, so both rows are stored
+    assert len(repo.list_logs()) == 2
+    with pytest.raises(RuntimeError):
+        le.tool_log_bulk([("nausea", "bad"), ("rash", "good")])
+    assert indexed == ["good", "good"]
+
+
+def test_log_batcher_aclose_flushes_queued_entries(repo, monkeypatch):
+    import tools.log_entry as le
+
+    monkeypatch.setattr(le, "upsert_entries", lambda user_id, entries: None)
+    # A long window: without aclose these would sit in the queue
+    batcher = le.LogBatcher(max_size=8, max_delay_ms=60_000)
+
+    async def main():
+        pending = [asyncio.ensure_future(batcher.submit(user_id="u1", text=f"cough {i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        await batcher.aclose()
+        return [p.result() for p in pending]
+
+    entries = asyncio.run(main())
+
+    assert [e.symptom for e in entries] == ["cough 0", "cough 1", "cough 2"]
+    assert len(repo.list_logs(user_id="u1")) == 3
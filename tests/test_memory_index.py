@@ -1,8 +1,6 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import List
-
 import importlib
 
 import pytest
@@ -22,23 +20,20 @@ class DummyNode:
 
 
 class DummyRetriever:
-    def __init__(self, docs: List, limit: int):
+    def __init__(self, docs: list[tuple[object, str]], limit: int):
         self._docs = docs
         self._limit = limit
 
     def retrieve(self, query: str):
         query_lc = query.lower()
-        matches = [
-            DummyNode(doc)
-            for doc in self._docs
-            if query_lc in getattr(doc, "text", "").lower()
-        ]
+        # Text was lowercased once at insert time
+        matches = [DummyNode(doc) for doc, text_lc in self._docs if query_lc in text_lc]
         return matches[: self._limit]
 
 
 class DummyStorageContext:
     def __init__(self) -> None:
-        self.persisted_dirs: List = []
+        self.persisted_dirs: list = []
 
     def persist(self, persist_dir):
         self.persisted_dirs.append(persist_dir)
@@ -46,43 +41,60 @@ class DummyStorageContext:
 
 class DummyIndex:
     def __init__(self) -> None:
-        self.documents: List = []
+        self.documents: list[tuple[object, str]] = []
         self.storage_context = DummyStorageContext()
 
     def insert(self, doc) -> None:
-        self.documents.append(doc)
+        self.documents.append((doc, getattr(doc, "text", "").lower()))
+
+    def insert_nodes(self, nodes) -> None:
+        for node in nodes:
+            self.insert(node)
+
+    @property
+    def ref_doc_info(self) -> dict:
+        return {getattr(doc, "ref_doc_id", None): None for doc, _ in self.documents}
 
     def as_retriever(self, similarity_top_k: int = 8):
         return DummyRetriever(self.documents, similarity_top_k)
 
 
+# Fixed timestamp so the samples are built once, at import, and are deterministic
+_FIXED_NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+_SAMPLES: list[SymptomLog] = [
+    SymptomLog(
+        symptom="Fever",
+        severity=Severity.mild,
+        started_at=_FIXED_NOW,
+        notes="High fever",
+    ),
+    SymptomLog(
+        symptom="Cough",
+        severity=Severity.moderate,
+        started_at=_FIXED_NOW,
+        notes="Persistent cough",
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def sample_entries() -> list[SymptomLog]:
+    # Shared across tests; the tests only read these entries
+    return _SAMPLES
+
+
 @pytest.fixture()
-def sample_entries() -> List[SymptomLog]:
-    now = datetime.now(timezone.utc)
-    return [
-        SymptomLog(
-            symptom="Fever",
-            severity=Severity.mild,
-            started_at=now,
-            notes="High fever",
-        ),
-        SymptomLog(
-            symptom="Cough",
-            severity=Severity.moderate,
-            started_at=now,
-            notes="Persistent cough",
-        ),
-    ]
-
-
-def test_upsert_entries_updates_index(monkeypatch, tmp_path, sample_entries):
+def dummy_index() -> DummyIndex:
+    # Function-scoped: upserts mutate the index
+    return DummyIndex()
+
+
+def test_upsert_entries_updates_index(monkeypatch, tmp_path, sample_entries, dummy_index):
     memory_index = importlib.import_module("memory.index")
     upsert_entries = memory_index.upsert_entries
     query_index = memory_index.query_index
 
-    dummy_index = DummyIndex()
-
-    def fake_build_or_load_index(user_id: str):
+    def fake_build_or_load_index(user_id: str, backfill: bool = True):
         return dummy_index
 
     def fake_persist_dir(user_id: str):
@@ -98,3 +110,40 @@ def test_upsert_entries_updates_index(monkeypatch, tmp_path, sample_entries):
     results = query_index("u-123", "fever")
 
     assert any("fever" in result["text"].lower() for result in results)
+
+
+@pytest.fixture()
+def backfill_env(monkeypatch, tmp_path, sample_entries, dummy_index):
+    memory_index = importlib.import_module("memory.index")
+    monkeypatch.setattr(memory_index, "build_or_load_index", lambda user_id, backfill=True: dummy_index)
+    monkeypatch.setattr(memory_index, "_persist_dir", lambda user_id: tmp_path)
+    monkeypatch.setattr(memory_index, "_BACKFILL_RETRY_S", 0)
+    return memory_index
+
+
+def test_backfill_marks_index_complete(monkeypatch, tmp_path, sample_entries, dummy_index, backfill_env):
+    monkeypatch.setattr(backfill_env, "get_entries", lambda user_id, since: sample_entries)
+
+    backfill_env._backfill_index("u-backfill")
+
+    assert len(dummy_index.documents) == len(sample_entries)
+    assert dummy_index.storage_context.persisted_dirs == [tmp_path]
+    assert (tmp_path / backfill_env._BACKFILL_MARKER).exists()
+
+
+def test_backfill_failure_retries_then_evicts(monkeypatch, tmp_path, dummy_index, backfill_env):
+    calls = []
+
+    def failing_get_entries(user_id, since):
+        calls.append(user_id)
+        raise RuntimeError("db unavailable")
+
+    monkeypatch.setattr(backfill_env, "get_entries", failing_get_entries)
+    backfill_env._cache_index("u-backfill", dummy_index)
+
+    backfill_env._backfill_index("u-backfill")
+
+    assert len(calls) == backfill_env._BACKFILL_ATTEMPTS
+    assert not (tmp_path / backfill_env._BACKFILL_MARKER).exists()
+    assert "u-backfill" not in backfill_env._index_cache
+    assert "u-backfill" not in backfill_env._backfilling
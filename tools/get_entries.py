@@ -1,15 +1,20 @@
 from datetime import datetime
 from typing import List, Optional
 
-from db.repository import list_logs
+from pydantic import TypeAdapter
+
 from tools.health_schema import SymptomLog
 
+_ENTRIES_ADAPTER = TypeAdapter(List[SymptomLog])
+
 
 def get_entries(user_id: str, since: Optional[datetime] = None) -> List[SymptomLog]:
     """Return recent symptom logs for the user, optionally filtered by 'since' (UTC).
 
     Filtering is delegated to :func:`db.repository.list_logs` so that SQL handles it.
     """
+    # Deferred so importing this module does not pull in SQLAlchemy
+    from db.repository import list_logs
 
     return list_logs(user_id=user_id, since=since)
 
@@ -18,9 +23,7 @@ def tool_get_entries(user_id: str, since: Optional[datetime] = None) -> List[dic
     """Compatibility wrapper that returns serialisable dictionaries."""
 
     entries = get_entries(user_id=user_id, since=since)
-    return [
-        entry.model_dump(exclude_none=True)
-        if isinstance(entry, SymptomLog)
-        else entry
-        for entry in entries
-    ]
+    # list_logs only ever yields SymptomLog models, so skip the per-item
+    # checks (the assert vanishes under -O) and dump in one pydantic-core pass
+    assert all(isinstance(entry, SymptomLog) for entry in entries)
+    return _ENTRIES_ADAPTER.dump_python(entries, exclude_none=True)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import re
-from datetime import datetime, time, timedelta
+import time as _time
+from datetime import date, datetime, time, timedelta
 from enum import Enum
+from functools import lru_cache
 from typing import List, Optional
 from uuid import uuid4
 from zoneinfo import ZoneInfo
@@ -10,7 +12,7 @@ from zoneinfo import ZoneInfo
 from dateutil.parser import parse
 from pydantic import BaseModel, Field, field_validator, model_validator
 
-__all__ = ["Severity", "SymptomLog", "natural_language_to_datetime"]
+__all__ = ["Severity", "SymptomLog", "natural_language_to_datetime", "utcnow"]
 
 
 class Severity(str, Enum):
@@ -26,24 +28,32 @@ class Severity(str, Enum):
         if not isinstance(value, str):
             raise ValueError(f"Unknown severity: {value}")
         val = value.strip().lower()
-        synonyms = {
-            "slight": "mild",
-            "light": "mild",
-            "average": "moderate",
-            "noticeable": "moderate",
-            "strong": "severe",
-            "intense": "severe",
-            "awful": "severe",
-            "terrible": "severe",
-        }
-        if val in synonyms:
-            return cls(synonyms[val])
+        if val in _SEVERITY_SYNONYMS:
+            return cls(_SEVERITY_SYNONYMS[val])
         return super()._missing_(val)
 
 
+# Module-level rather than a class attribute: Enum would turn it into a member
+_SEVERITY_SYNONYMS = {
+    "slight": "mild",
+    "light": "mild",
+    "average": "moderate",
+    "noticeable": "moderate",
+    "strong": "severe",
+    "intense": "severe",
+    "awful": "severe",
+    "terrible": "severe",
+}
+
+
 _DEF_TZ = ZoneInfo("UTC")
 
 
+def utcnow() -> datetime:
+    """Current time as an aware UTC datetime, reusing the module's cached tz object."""
+    return datetime.fromtimestamp(_time.time(), _DEF_TZ)
+
+
 def _to_utc(dt: datetime) -> datetime:
     """Ensure a datetime is timezone-aware and converted to UTC."""
     if dt.tzinfo is None:
@@ -51,47 +61,87 @@ def _to_utc(dt: datetime) -> datetime:
     return dt.astimezone(_DEF_TZ)
 
 
-def natural_language_to_datetime(text: str, user_tz: str | None = "UTC") -> datetime:
-    """Convert simple natural language expressions to a UTC datetime."""
-    tz: ZoneInfo
+_ISO_MINUTE_RE = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}")
+
+
+def _iso_or_none(text: str) -> datetime | None:
+    """Parse a full ISO 8601 string with the C parser, or return ``None``."""
     try:
-        tz = ZoneInfo(user_tz or "UTC")
-    except Exception:
-        tz = _DEF_TZ
+        return datetime.fromisoformat(text.strip())
+    except ValueError:
+        return None
+
 
-    match = re.search(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}", text)
-    if match:
-        dt = parse(match.group(0))
+@lru_cache(maxsize=64)
+def _tz(name: str | None) -> ZoneInfo:
+    """``ZoneInfo`` for ``name``, falling back to UTC for unknown zones."""
+    try:
+        return ZoneInfo(name or "UTC")
+    except Exception:
+        return _DEF_TZ
+
+
+# phrase -> (days before today, local time); ``None`` means the current instant
+_PHRASE_TIMES: dict[str, tuple[int, time] | None] = {
+    "this morning": (0, time(8, 0)),
+    "this afternoon": (0, time(15, 0)),
+    "tonight": (0, time(20, 0)),
+    "this evening": (0, time(20, 0)),
+    "last night": (1, time(22, 0)),
+    "yesterday": (1, time(12, 0)),
+    "now": None,
+    "today": None,
+}
+# Alternation in priority order; the earliest-listed phrase present wins
+_PHRASE_RANK = {phrase: rank for rank, phrase in enumerate(_PHRASE_TIMES)}
+_PHRASE_RE = re.compile("|".join(map(re.escape, _PHRASE_TIMES)))
+
+
+@lru_cache(maxsize=1024)
+def _parse_cached(text: str, tz: ZoneInfo, today: date) -> datetime | None:
+    """Parse ``text`` relative to ``today``; ``None`` means "the current instant".
+
+    ``today`` is part of the cache key, so relative phrases and partial dates
+    (which dateutil fills in from the current date) never go stale.
+    """
+    dt = _iso_or_none(text)
+    if dt is not None:
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=tz)
+    elif match := _ISO_MINUTE_RE.search(text):
+        dt = datetime.fromisoformat(match.group(0)).replace(tzinfo=tz)
     else:
         t = text.strip().lower()
-        now = datetime.now(tz)
-        today = now.date()
-        if "this morning" in t:
-            dt = datetime.combine(today, time(8, 0), tzinfo=tz)
-        elif "this afternoon" in t:
-            dt = datetime.combine(today, time(15, 0), tzinfo=tz)
-        elif "tonight" in t or "this evening" in t:
-            dt = datetime.combine(today, time(20, 0), tzinfo=tz)
-        elif "last night" in t:
-            dt = datetime.combine(today - timedelta(days=1), time(22, 0), tzinfo=tz)
-        elif "yesterday" in t:
-            dt = datetime.combine(today - timedelta(days=1), time(12, 0), tzinfo=tz)
-        elif "now" in t or "today" in t:
-            dt = now
+        hits = _PHRASE_RE.findall(t)
+        if hits:
+            rule = _PHRASE_TIMES[min(hits, key=_PHRASE_RANK.__getitem__)]
+            if rule is None:
+                return None
+            days_back, at = rule
+            dt = datetime.combine(today - timedelta(days=days_back), at, tzinfo=tz)
         else:
-            dt = parse(t)
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=tz)
+            # Fill missing fields from ``today`` (the cache key), not the
+            # system's local date, so a cached result is never a day off
+            dt = parse(t, default=datetime.combine(today, time(), tzinfo=tz))
     return dt.astimezone(_DEF_TZ)
 
 
+def natural_language_to_datetime(text: str, user_tz: str | None = "UTC") -> datetime:
+    """Convert simple natural language expressions to a UTC datetime."""
+    tz = _tz(user_tz)
+    now = datetime.now(tz)
+    dt = _parse_cached(text, tz, now.date())
+    return now.astimezone(_DEF_TZ) if dt is None else dt
+
+
+_DATETIME_FIELDS = ("created_at", "started_at", "ended_at")
+
+
 class SymptomLog(BaseModel):
     """Record of a user's symptom observation."""
 
     id: str = Field(default_factory=lambda: str(uuid4()))
-    created_at: datetime = Field(default_factory=lambda: datetime.utcnow().replace(tzinfo=_DEF_TZ))
+    created_at: datetime = Field(default_factory=utcnow)
     symptom: str
     severity: Severity
     started_at: datetime
@@ -126,8 +176,25 @@ class SymptomLog(BaseModel):
                 raise ValueError("started_at must be before or equal to ended_at")
         return self
 
+    @classmethod
+    def from_orm_fast(cls, row: object) -> "SymptomLog":
+        """Build from a trusted ORM row without running the validator chain.
+
+        The DB schema already constrains the values; the only fix-up needed is
+        re-attaching UTC, since SQLite hands back naive datetimes.
+        """
+        values = {name: getattr(row, name) for name in _SYMPTOM_LOG_FIELDS}
+        for key in _DATETIME_FIELDS:
+            dt = values[key]
+            if dt is not None and dt.tzinfo is None:
+                values[key] = dt.replace(tzinfo=_DEF_TZ)
+        return cls.model_construct(**values)
+
     @property
     def duration(self) -> Optional[int]:
         if self.started_at and self.ended_at:
             return int((self.ended_at - self.started_at).total_seconds())
         return None
+
+
+_SYMPTOM_LOG_FIELDS = tuple(SymptomLog.model_fields)
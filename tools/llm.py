@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+import httpx
+from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.llms.openai import OpenAI
+
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+_TIMEOUT = httpx.Timeout(60.0)
+
+# LLM_CONCURRENCY bounds each path separately: blocking callers (Gradio worker
+# threads) share a thread semaphore, coroutines share an asyncio one per loop,
+# so waiting coroutines never park a thread in the default executor.
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "2"))
+_LLM_SLOTS = threading.BoundedSemaphore(LLM_CONCURRENCY)
+_ASYNC_LLM_SLOTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+@contextmanager
+def llm_slot() -> Iterator[None]:
+    """Hold one of the ``LLM_CONCURRENCY`` slots for a blocking LLM call."""
+    with _LLM_SLOTS:
+        yield
+
+
+@asynccontextmanager
+async def allm_slot() -> AsyncIterator[None]:
+    """Async :func:`llm_slot`; waits on the running loop's ``asyncio.Semaphore``."""
+    loop = asyncio.get_running_loop()
+    slots = _ASYNC_LLM_SLOTS.get(loop)
+    if slots is None:
+        slots = _ASYNC_LLM_SLOTS[loop] = asyncio.Semaphore(LLM_CONCURRENCY)
+    async with slots:
+        yield
+
+
+@functools.lru_cache(maxsize=1)
+def _http_client() -> httpx.Client:
+    return httpx.Client(limits=_LIMITS, timeout=_TIMEOUT)
+
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """Route async requests through a connection pool owned by the running loop.
+
+    httpcore pools bind their connections to the loop that opened them, so a
+    single shared pool breaks once a second loop (``asyncio.run`` in a script
+    or a test, a restarted server) reuses it. Keying pools on the loop, like
+    ``allm_slot`` does for its semaphores, lets the cached LLM and embedding
+    clients stay process-wide.
+    """
+
+    def __init__(self) -> None:
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = httpx.AsyncHTTPTransport(limits=_LIMITS)
+        return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+_ASYNC_TRANSPORT = _PerLoopTransport()
+
+
+@functools.lru_cache(maxsize=1)
+def _async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=_ASYNC_TRANSPORT, timeout=_TIMEOUT)
+
+
+async def aclose_http_pool() -> None:
+    """Close the running loop's async connection pool; call before the loop ends."""
+    await _ASYNC_TRANSPORT.aclose()
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm(model: str, temperature: float) -> OpenAI:
+    """Return a shared OpenAI LLM whose sync/async calls reuse pooled connections."""
+    return OpenAI(
+        model=model,
+        temperature=temperature,
+        http_client=_http_client(),
+        async_http_client=_async_http_client(),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedding(model: str = "text-embedding-3-small") -> OpenAIEmbedding:
+    """Return a shared embedding model that sends up to 256 texts per request."""
+    return OpenAIEmbedding(
+        model=model,
+        embed_batch_size=256,
+        http_client=_http_client(),
+        async_http_client=_async_http_client(),
+    )
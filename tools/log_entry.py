@@ -1,23 +1,34 @@
-from datetime import datetime, timezone
-import json
+import asyncio
+from collections import defaultdict
 import logging
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-from tools.health_schema import SymptomLog, Severity
+import orjson
+
+from tools.health_schema import SymptomLog, Severity, utcnow
 from memory.index import upsert_entries
-from db.engine import SessionLocal, Base, engine
-from db.models import SymptomLogORM
+from db import repository as repo
 
 
-def ensure_tables() -> None:
-    """Create database tables if they do not already exist."""
-    Base.metadata.create_all(engine)
+logger = logging.getLogger(__name__)
 
 
-logger = logging.getLogger(__name__)
+def _build_entry(text: str, user_id: str) -> SymptomLog:
+    # Every field is built here with its final type (aware UTC time, enum
+    # member), so skip the validator chain; defaults still fill id/created_at
+    return SymptomLog.model_construct(
+        symptom=text,
+        severity=Severity.none,
+        started_at=utcnow(),
+        # Same shape as json.dumps({"user_id": user_id}), without the dict;
+        # orjson only escapes the id string
+        notes=f'{{"user_id": {orjson.dumps(user_id).decode()}}}',
+    )
 
 
-def tool_log(text: str, user_id: str) -> str:
-    """Persist a free-form symptom description.
+def tool_log(text: str, user_id: str) -> SymptomLog:
+    """Persist a free-form symptom description and return the stored entry.
 
     Parameters
     ----------
@@ -26,35 +37,159 @@ def tool_log(text: str, user_id: str) -> str:
     user_id : str
         Identifier for the submitting user.
     """
-    ensure_tables()
+    return tool_log_bulk([(text, user_id)])[0]
 
-    entry = SymptomLog(
-        symptom=text,
-        severity=Severity.none,
-        started_at=datetime.now(timezone.utc),
-        notes=json.dumps({"user_id": user_id}),
-    )
 
-    with SessionLocal() as db:
-        try:
-            orm_entry = SymptomLogORM(**entry.model_dump())
-            db.add(orm_entry)
-            db.commit()
-            db.refresh(orm_entry)
-
-            upsert_entries(
-                user_id,
-                [SymptomLog.model_validate(orm_entry, from_attributes=True)],
-            )
-        except Exception as exc:
-            db.rollback()
-            logger.error("Failed to log symptom entry: %s", exc)
-            raise
+def tool_log_bulk(items: Iterable[Tuple[str, str]]) -> List[SymptomLog]:
+    """Persist ``(text, user_id)`` pairs in one transaction and return the stored entries.
 
-    return f"Logged entry with id: {orm_entry.id}"
+    Index updates are grouped per user, so N entries cost one DB round trip
+    plus one index upsert per distinct user.
+    """
+    pairs = [(user_id, _build_entry(text, user_id)) for text, user_id in items]
+
+    try:
+        # The entries already hold exactly what was written; no need to re-SELECT them
+        failures = persist_entries(pairs)
+    except Exception as exc:
+        logger.error("Failed to log %d symptom entries: %s", len(pairs), exc)
+        raise
+    if failures:
+        # Every user's index was still attempted; surface the first error
+        raise next(iter(failures.values()))
+
+    return [entry for _, entry in pairs]
+
+
+def tool_log_str(text: str, user_id: str) -> str:
+    """String-returning variant of :func:`tool_log` for LLM tool calls."""
 
+    return f"Logged entry with id: {tool_log(text=text, user_id=user_id).id}"
 
-def log_entry(user_id: str, message: str) -> str:
+
+def log_entry(user_id: str, message: str) -> SymptomLog:
     """Convenience wrapper matching the adapter signature used by the API layer."""
 
     return tool_log(text=message, user_id=user_id)
+
+
+def _group_by_user(items: Iterable[Tuple[str, SymptomLog]]) -> Dict[str, List[SymptomLog]]:
+    by_user: Dict[str, List[SymptomLog]] = defaultdict(list)
+    for user_id, entry in items:
+        by_user[user_id].append(entry)
+    return by_user
+
+
+def persist_entries(items: Iterable[Tuple[str, SymptomLog]]) -> Dict[str, Exception]:
+    """Insert ``(user_id, entry)`` pairs in one transaction, then update each user's index.
+
+    An insert failure raises. Index updates run after the commit, so one
+    user's failure neither undoes the rows nor skips the other users: errors
+    are logged and returned keyed by ``user_id``.
+    """
+    items = list(items)
+    repo.add_logs(entry for _, entry in items)
+
+    failures: Dict[str, Exception] = {}
+    for user_id, entries in _group_by_user(items).items():
+        try:
+            upsert_entries(user_id, entries)
+        except Exception as exc:
+            logger.error("Failed to index %d entries for %s: %s", len(entries), user_id, exc)
+            failures[user_id] = exc
+    return failures
+
+
+_STOP = object()  # queue sentinel: flush what is queued, then exit
+
+
+class LogBatcher:
+    """Coalesce concurrent log writes into one DB transaction per window.
+
+    Entries are flushed once ``max_size`` are queued or ``max_delay_ms`` has
+    elapsed since the first one arrived, whichever comes first. Each caller
+    awaits its own entry, which resolves as soon as the INSERT commits; the
+    per-user index updates then run concurrently in the background, so
+    embedding latency never holds up the next batch. Index errors are logged
+    (the rows are already stored). Call :meth:`aclose` on shutdown.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, max_delay_ms: Optional[float] = None) -> None:
+        self.max_size = max_size or int(os.getenv("LOG_BATCH_SIZE", "32"))
+        self.max_delay = (max_delay_ms or float(os.getenv("LOG_BATCH_MS", "50"))) / 1000
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._index_tasks: Set[asyncio.Task] = set()
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+            self._index_tasks = set()
+        return self._queue
+
+    async def submit(self, user_id: str, text: str) -> SymptomLog:
+        """Queue a free-form symptom description and wait until it is stored."""
+        entry = _build_entry(text, user_id)
+        fut = asyncio.get_running_loop().create_future()
+        await self._ensure_worker().put((user_id, entry, fut))
+        return await fut
+
+    async def aclose(self) -> None:
+        """Flush queued entries, stop the worker and wait for pending index updates."""
+        if self._worker is None or self._loop is not asyncio.get_running_loop():
+            return
+        if not self._worker.done():
+            await self._queue.put(_STOP)
+            await self._worker
+        if self._index_tasks:
+            await asyncio.gather(*self._index_tasks, return_exceptions=True)
+        self._worker = None
+
+    async def _index(self, user_id: str, entries: List[SymptomLog]) -> None:
+        try:
+            await asyncio.to_thread(upsert_entries, user_id, entries)
+        except Exception as exc:
+            logger.error("Failed to index %d entries for %s: %s", len(entries), user_id, exc)
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await asyncio.to_thread(repo.add_logs, [e for _, e, _ in batch])
+            except Exception as exc:
+                logger.error("Failed to log %d symptom entries: %s", len(batch), exc)
+                for _, _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+
+            for _, entry, fut in batch:
+                if not fut.done():
+                    fut.set_result(entry)
+            for user_id, entries in _group_by_user((u, e) for u, e, _ in batch).items():
+                task = loop.create_task(self._index(user_id, entries))
+                self._index_tasks.add(task)
+                task.add_done_callback(self._index_tasks.discard)
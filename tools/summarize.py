@@ -1,22 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+
 from tools.get_entries import tool_get_entries
 from memory.index import query_index
-from llama_index.core import VectorStoreIndex, Document, Settings
-from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.core import Document
+from tools.llm import allm_slot, get_llm, llm_slot
+
+def _entry_text(entry: dict) -> str:
+    """Plain-text rendering of an entry dictionary, shared by documents and prompts."""
+    g = entry.get
+    notes = g("notes")
+    return (
+        f"Symptom: {g('symptom')}\nSeverity: {g('severity')}\nStarted: {g('started_at')}"
+        + (f"\nNotes: {notes}" if notes else "")
+    )
+
 
 def _entry_to_doc(entry: dict) -> Document:
     """Convert an entry dictionary to a LlamaIndex Document."""
-    text_parts: list[str] = [
-        f"Symptom: {entry.get('symptom')}",
-        f"Severity: {entry.get('severity')}",
-        f"Started: {entry.get('started_at')}",
-    ]
-    notes = entry.get("notes")
-    if notes:
-        text_parts.append(f"Notes: {notes}")
-    return Document(text="\n".join(text_parts), doc_id=str(entry.get("id")))
+    return Document(text=_entry_text(entry), doc_id=str(entry.get("id")))
 
 
 def _format_bullets(entries: list[dict]) -> str:
@@ -34,71 +38,113 @@ def _format_bullets(entries: list[dict]) -> str:
     return "\n".join(fmt(e) for e in entries)
 
 
-def tool_summarize(user_id: str) -> str:
-    """Summarize the recent symptom logs for ``user_id``."""
+def _ctx_text(c) -> str:
+    if isinstance(c, dict):
+        return c.get("text", "")
+    text = getattr(c, "text", None)
+    if text is not None:
+        return text
+    getter = getattr(c, "get_content", None)
+    if callable(getter):
+        try:
+            return getter()
+        except Exception:
+            return ""
+    return str(c)
+
+
+def _recent_and_context(user_id: str) -> tuple[list[dict], list]:
+    """Return the 5 newest entries and retrieved index context for ``user_id``."""
     entries = tool_get_entries(user_id)
     if not entries:
-        return "No entries found for this user."
+        return [], []
 
-    # Sort newest first and keep last 5
-    entries.sort(
-        key=lambda e: e.get("started_at") or e.get("created_at"),
-        reverse=True,
-    )
-    recent = entries[:5]
+    # Newest 5 first; a bounded heap instead of sorting every entry
+    recent = heapq.nlargest(5, entries, key=lambda e: e.get("started_at") or e.get("created_at"))
+    if len(entries) <= len(recent):
+        # Retrieval could only return entries already in ``recent``; the
+        # empty context sends the caller down the inline-entries prompt
+        return recent, []
 
     ctx = query_index(
         user_id,
         "Summarize this user's recent symptoms in a short, doctor-friendly note.",
         k=8,
     )
+    return recent, ctx
 
-    if ctx:
-        def _ctx_text(c):
-            if isinstance(c, dict):
-                return c.get("text", "")
-            text = getattr(c, "text", None)
-            if text is not None:
-                return text
-            getter = getattr(c, "get_content", None)
-            if callable(getter):
-                try:
-                    return getter()
-                except Exception:
-                    return ""
-            return str(c)
-
-        snippets = "\n\n".join(_ctx_text(c) for c in ctx[:5])
-        prompt = (
-            "Given the following symptom logs, provide a concise bullet point "
-            "summary suitable for a doctor.\n" + snippets
-        )
-        try:
-            llm = OpenAI(model="gpt-3.5-turbo", temperature=0.3)
-            response = llm.complete(prompt)
-            return response.text
-        except Exception:
-            return _format_bullets(recent)
-
-    # Fallback to DB query if retrieval returns nothing
-    Settings.llm = None
-    embed_model = OpenAIEmbedding(model="text-embedding-3-small")
-    Settings.embed_model = embed_model
-    docs = [_entry_to_doc(e) for e in recent]
-    index = VectorStoreIndex.from_documents(docs)
-
-    prompt = (
-        "Provide a concise bullet point summary suitable for a doctor of the "
-        "patient's recent symptom entries."
+
+def _ctx_prompt(ctx: list) -> str:
+    snippets = "\n\n".join(_ctx_text(c) for c in ctx[:5])
+    return (
+        "Given the following symptom logs, provide a concise bullet point "
+        "summary suitable for a doctor.\n" + snippets
     )
 
+
+_FALLBACK_PROMPT = (
+    "Provide a concise bullet point summary suitable for a doctor of the "
+    "patient's recent symptom entries."
+)
+
+
+def _fallback_prompt(recent: list[dict]) -> str:
+    """Prompt carrying ``recent`` inline for when retrieval returns nothing.
+
+    At most five entries: they fit in the prompt, so embedding them into a
+    throwaway index only to retrieve all of them again would be wasted work.
+    """
+    entries = "\n\n".join(_entry_text(e) for e in recent)
+    return f"{_FALLBACK_PROMPT}\n{entries}"
+
+
+def summarize_with_status(user_id: str) -> tuple[str, bool]:
+    """Summarize ``user_id``'s recent logs; the flag is ``False`` for the bullet fallback.
+
+    Callers caching summaries use the flag to avoid pinning the fallback that
+    a transient LLM error produces.
+    """
+    recent, ctx = _recent_and_context(user_id)
+    if not recent:
+        return "No entries found for this user.", True
+
+    # Retrieved context when there is any, else the DB entries themselves
+    prompt = _ctx_prompt(ctx) if ctx else _fallback_prompt(recent)
     try:
-        Settings.llm = OpenAI(model="gpt-3.5-turbo", temperature=0.3)
-        query_engine = index.as_query_engine()
-        response = query_engine.query(prompt)
-        return str(response)
+        with llm_slot():
+            response = get_llm("gpt-3.5-turbo", 0.3).complete(prompt)
+        return response.text, True
     except Exception:
-        return _format_bullets(recent)
+        return _format_bullets(recent), False
+
+
+async def summarize_with_status_async(user_id: str) -> tuple[str, bool]:
+    """Async :func:`summarize_with_status` that awaits the LLM call.
+
+    DB reads and retrieval are still synchronous and run in a worker thread;
+    only the (slow) completion is awaited on the event loop.
+    """
+    recent, ctx = await asyncio.to_thread(_recent_and_context, user_id)
+    if not recent:
+        return "No entries found for this user.", True
+
+    prompt = _ctx_prompt(ctx) if ctx else _fallback_prompt(recent)
+    try:
+        async with allm_slot():
+            response = await get_llm("gpt-3.5-turbo", 0.3).acomplete(prompt)
+        return response.text, True
+    except Exception:
+        return _format_bullets(recent), False
+
+
+def tool_summarize(user_id: str) -> str:
+    """Summarize the recent symptom logs for ``user_id``."""
+    return summarize_with_status(user_id)[0]
+
+
+async def tool_summarize_async(user_id: str) -> str:
+    """Async variant of :func:`tool_summarize` that awaits the LLM call."""
+    return (await summarize_with_status_async(user_id))[0]
 
 
 def summarize(user_id: str, question: str | None = None, days: int = 7) -> str:
@@ -106,3 +152,10 @@ def summarize(user_id: str, question: str | None = None, days: int = 7) -> str:
 
     _ = question, days
     return tool_summarize(user_id=user_id)
+
+
+async def summarize_async(user_id: str, question: str | None = None, days: int = 7) -> str:
+    """Async counterpart of :func:`summarize`."""
+
+    _ = question, days
+    return await tool_summarize_async(user_id=user_id)